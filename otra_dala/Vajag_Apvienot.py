@@ -1,10 +1,16 @@
 import os
+import argparse
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.colors import LinearSegmentedColormap
 import matplotlib.dates as mdates
-import datetime
+import c2_scan
+import group_stats
+import plotting
+import maintenance_events
+import pipeline
+import profiling
 
 def create_output_folder(base_path):
     """Creates an output folder to store results."""
@@ -13,39 +19,10 @@ def create_output_folder(base_path):
     return output_folder
 
 def process_folder(folder_path, output_folder):
-    """Processes CSV files in the specified folder and combines C2 values into a single CSV."""
-    filenames = []
-    c2_values = []
-    
-    csv_files = [f for f in os.listdir(folder_path) if f.endswith('.csv')]
-    csv_files.sort(key=lambda f: datetime.datetime.strptime(f.split('.')[0].replace('_', ' '), '%Y %m %d %H-%M-%S'))
-    
-    print(f"Number of files in {folder_path}: {len(csv_files)}")
-    
-    for filename in csv_files:
-        try:
-            file_path = os.path.join(folder_path, filename)
-            df = pd.read_csv(file_path)
-            c2_column = next((col for col in df.columns if 'Value' in col), None)
-            
-            if c2_column is not None:
-                date_time_str = filename.split('.')[0].replace('_', ' ')
-                date_time = datetime.datetime.strptime(date_time_str, '%Y %m %d %H-%M-%S')
-                new_filename = date_time.strftime('%Y.%m.%d_%H:%M:%S')
-                filenames.append(new_filename)
-                c2_values.append(df[c2_column].iloc[0])
-            else:
-                print(f"No 'Value' column found in {filename}")
-        except Exception as e:
-            print(f"Error processing {filename}: {e}")
-    
-    data = {'Filename': filenames, 'C2 Value': c2_values}
-    df = pd.DataFrame(data)
-    
+    """Processes CSV files (or a spectrum store) in the specified folder and combines C2 values into a single CSV."""
+    values = c2_scan.scan_c2_values(folder_path)
     csv_path = os.path.join(output_folder, "combined_c2_values.csv")
-    df.to_csv(csv_path, index=False)
-    
-    return csv_path
+    return c2_scan.save_combined_c2_values(values, csv_path)
 
 def calculate_hourly_medians(csv_path, output_folder):
     """Calculates hourly medians from combined C2 values and saves to CSV."""
@@ -61,6 +38,19 @@ def calculate_hourly_medians(csv_path, output_folder):
     print(f"Hourly medians saved to {hourly_medians_csv}")
     return hourly_medians_csv
 
+def calculate_sliding_medians(csv_path, output_folder, window='60min'):
+    """Adds a centered time-window median of the C2 values next to every raw value."""
+    df = pd.read_csv(csv_path)
+    df['Datetime'] = pd.to_datetime(df['Filename'], format='%Y.%m.%d_%H:%M:%S')
+    df = df.sort_values('Datetime')
+    # Laika logs (t - window/2, t + window/2]; NaN vērtības netiek skaitītas
+    df[f'C2 Median ({window})'] = df.set_index('Datetime')['C2 Value'].rolling(window, center=True).median().to_numpy()
+
+    smoothed_csv = os.path.join(output_folder, "smoothed_c2_values.csv")
+    df[['Datetime', 'C2 Value', f'C2 Median ({window})']].to_csv(smoothed_csv, index=False)
+    print(f"Sliding medians saved to {smoothed_csv}")
+    return smoothed_csv
+
 def save_plot_data(df, output_folder):
     """Saves plot data to CSV for later use."""
     df.to_csv(os.path.join(output_folder, 'c2_value_vs_datetime.csv'), index=False)
@@ -73,22 +63,30 @@ def create_plot(input_file, output_folder):
     # Save the data for later use
     save_plot_data(df, output_folder)
 
-    fig, ax = plt.subplots(figsize=(22, 12))
-    ax.plot(df['Datetime'], df['C2 Value'], color='gray', alpha=0.5, linewidth=1)
+    output_file = os.path.join(output_folder, 'c2_value_vs_datetime_plot_legend_moved.png')
+    events = maintenance_events.load_events()
 
-    for name, group in df.groupby(df['Datetime'].dt.to_period('W')):
-        ax.scatter(group['Datetime'], group['C2 Value'], label=name.start_time.strftime('%Y-%m-%d'), alpha=0.7)
+    def render():
+        # Draw at most a min/max pair per pixel column of the saved figure
+        plot_df = plotting.downsample(df, 'Datetime', 'C2 Value', plotting.pixel_width(22, 300))
 
-    customize_plot(ax, fig)
-    add_events(ax)
+        fig, ax = plt.subplots(figsize=(22, 12))
+        ax.plot(plot_df['Datetime'], plot_df['C2 Value'], color='gray', alpha=0.5, linewidth=1)
 
-    plt.tight_layout()
-    plt.subplots_adjust(right=0.85)
+        for name, group in plot_df.groupby(plot_df['Datetime'].dt.to_period('W')):
+            ax.scatter(group['Datetime'], group['C2 Value'], label=name.start_time.strftime('%Y-%m-%d'), alpha=0.7)
 
-    output_file = os.path.join(output_folder, 'c2_value_vs_datetime_plot_legend_moved.png')
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
-    print(f"Plot saved as {output_file}")
-    plt.close(fig)
+        customize_plot(ax, fig)
+        add_events(ax, events)
+
+        plt.tight_layout()
+        plt.subplots_adjust(right=0.85)
+
+        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+        print(f"Plot saved as {output_file}")
+        plt.close(fig)
+
+    plotting.render_cached(output_file, [df, events, 'create_plot'], render)
 
 def customize_plot(ax, fig):
     """Customizes the plot appearance."""
@@ -101,23 +99,12 @@ def customize_plot(ax, fig):
     fig.autofmt_xdate()
     ax.legend(title='Week Starting', bbox_to_anchor=(1.05, 1), loc='upper left')
 
-def add_events(ax):
-    """Annotates significant events on the plot."""
-    events = [
-        ('2024-06-25 09:40', "Bearing #1 powder add, RPM change from 300 to 430"),
-        ('2024-07-09 13:30', "Bearing #1 bearing degreased slightly"),
-        ('2024-07-10 14:16', "Bearing #2 New bearing installed. May be minor damages during installation."),
-        ('2024-07-16 12:00', "Pure motor: Motor disconnected from bearing"),
-        ('2024-07-16 14:30', "Pure motor: Second Device added (gray)"),
-        ('2024-07-16 15:30', "Pure motor: Second Device failed to record"),
-        ('2024-07-16 16:37', "Bearing #1 Completely degreased"),
-        ('2024-07-18 17:29', "Bearing #1 Greased with blue grease"),
-        ('2024-07-19 21:11', "Bearing #1 Added ceramics with blue grease"),
-        ('2024-07-22 13:34', "Empty room: Tests in office room, no motor")
-    ]
-    
-    for date, label in events:
-        event_time = pd.to_datetime(date, format='%Y-%m-%d %H:%M')
+def add_events(ax, events=None):
+    """Annotates significant events (the maintenance log) on the plot."""
+    if events is None:
+        events = maintenance_events.load_events()
+
+    for event_time, label in zip(events['Datetime'], events['Event']):
         ax.axvline(event_time, color='red', linestyle='--', alpha=0.5)
         ax.annotate(label, (event_time, ax.get_ylim()[1]), 
                     xytext=(10, 0), textcoords='offset points', 
@@ -135,35 +122,34 @@ def load_range_data(file_path):
     df = pd.read_csv(file_path, parse_dates=['Datetime'])
     return df
 
-def compute_daily_ranges(df, num_ranges=12):
-    """Computes daily ranges for the C2 values."""
-    df['Date'] = df['Datetime'].dt.date
-    daily_data = df.groupby('Date')['C2 Value'].agg(list).reset_index()
-    
-    daily_ranges = []
-    for _, row in daily_data.iterrows():
-        values = np.array(row['C2 Value'])
-        percentiles = np.percentile(values, np.linspace(0, 100, num_ranges+1))
-        daily_ranges.append(percentiles[1:])  # Exclude the 0th percentile
-    
-    return daily_data['Date'], daily_ranges
+def compute_daily_ranges(df, num_ranges=12, by='day'):
+    """Computes percentile ranges of the C2 values per day (or 'week'/'shift') as a tidy Date/Range/C2 Value table."""
+    table = group_stats.percentile_range_table(df['Datetime'].values, df['C2 Value'].values, num_ranges, by=by)
+    return table.rename(columns={'Group': 'Date', 'Value': 'C2 Value'})
 
 def create_overlay_plot(combined_df, range_df, save_path):
     """Creates an overlay plot of combined C2 values and their ranges."""
+    plotting.render_cached(save_path, [combined_df, range_df, 'create_overlay_plot'],
+                           lambda: render_overlay_plot(combined_df, range_df, save_path))
+
+def render_overlay_plot(combined_df, range_df, save_path):
+    """Draws and saves the overlay plot (see create_overlay_plot)."""
     plt.figure(figsize=(14, 8))
 
-    # Plot combined data
-    plt.plot(combined_df['Datetime'], combined_df['C2 Value'], color='gray', alpha=0.5, label='C2 Value Over Time')
+    # Plot combined data, reduced to a min/max pair per pixel column
+    plot_df = plotting.downsample(combined_df, 'Datetime', 'C2 Value', plotting.pixel_width(14, 300))
+    plt.plot(plot_df['Datetime'], plot_df['C2 Value'], color='gray', alpha=0.5, label='C2 Value Over Time')
 
     # Plot range data
-    dates, ranges = compute_daily_ranges(range_df)
-    colors = plt.cm.rainbow(np.linspace(0, 1, len(ranges[0])))
+    ranges = compute_daily_ranges(range_df)
+    num_ranges = ranges['Range'].max()
+    colors = plt.cm.rainbow(np.linspace(0, 1, num_ranges))
     colors = [[c[0], c[1], c[2], 1.0] for c in colors]  # Increase alpha to 1.0 for full opacity
-    saturated_cmap = LinearSegmentedColormap.from_list("saturated", colors, N=len(ranges[0]))
+    saturated_cmap = LinearSegmentedColormap.from_list("saturated", colors, N=num_ranges)
 
-    for i in range(len(ranges[0])):
-        range_data = [r[i] for r in ranges]
-        plt.plot(dates, range_data, marker='o', label=f'Range {i+1}', color=saturated_cmap(i/len(ranges[0])), linewidth=2)
+    for i, range_data in ranges.groupby('Range'):
+        plt.plot(range_data['Date'], range_data['C2 Value'], marker='o', label=f'Range {i}',
+                 color=saturated_cmap((i - 1)/num_ranges), linewidth=2)
 
     plt.xlabel('Date')
     plt.ylabel('C2 Value')
@@ -175,28 +161,56 @@ def create_overlay_plot(combined_df, range_df, save_path):
 
     plt.savefig(save_path, dpi=300, bbox_inches='tight')
     print(f"Overlay plot saved as {save_path}")
-    plt.show()
+    plotting.finish_figure()
+
+def overlay_plot(combined_file_path, range_file_path, save_path):
+    """Loads the plot data and the hourly medians and creates the overlay plot."""
+    combined_df = load_combined_data(combined_file_path)
+    range_df = load_range_data(range_file_path)
+    create_overlay_plot(combined_df, range_df, save_path)
+
+def report_stages(input_folder, output_folder):
+    """The report chain as pipeline stages, each with the files it reads and writes."""
+    combined_csv = os.path.join(output_folder, "combined_c2_values.csv")
+    hourly_csv = os.path.join(output_folder, "hourly_medians_c2_values.csv")
+    smoothed_csv = os.path.join(output_folder, "smoothed_c2_values.csv")
+    plot_csv = os.path.join(output_folder, 'c2_value_vs_datetime.csv')
+    plot_png = os.path.join(output_folder, 'c2_value_vs_datetime_plot_legend_moved.png')
+    overlay_png = os.path.join(output_folder, 'overlayed_c2_value_and_ranges.png')
+
+    return [
+        pipeline.Stage('process_folder', process_folder, (input_folder, output_folder),
+                       inputs=[input_folder], outputs=[combined_csv]),
+        pipeline.Stage('calculate_hourly_medians', calculate_hourly_medians, (combined_csv, output_folder),
+                       inputs=[combined_csv], outputs=[hourly_csv]),
+        pipeline.Stage('calculate_sliding_medians', calculate_sliding_medians, (combined_csv, output_folder),
+                       inputs=[combined_csv], outputs=[smoothed_csv]),
+        pipeline.Stage('create_plot', create_plot, (hourly_csv, output_folder),
+                       inputs=[hourly_csv, maintenance_events.events_file], outputs=[plot_csv, plot_png], lock='pyplot'),
+        pipeline.Stage('create_overlay_plot', overlay_plot, (plot_csv, hourly_csv, overlay_png),
+                       inputs=[plot_csv, hourly_csv], outputs=[overlay_png], lock='pyplot'),
+    ]
 
-def main():
-    """Main execution function."""
+def main(workers=1, force=False):
+    """Main execution function: runs only the stages whose inputs changed since the last run."""
     base_path = '/home/arce'
     input_folder = os.path.join(base_path, 'csv_output')
     output_folder = create_output_folder(base_path)
-    
-    # Process combined data
-    csv_path = process_folder(input_folder, output_folder)
-    hourly_medians_csv = calculate_hourly_medians(csv_path, output_folder)
-    create_plot(hourly_medians_csv, output_folder)
-    
-    # Load data for overlay
-    combined_file_path = os.path.join(output_folder, 'c2_value_vs_datetime.csv')
-    range_file_path = os.path.join(output_folder, 'hourly_medians_c2_values.csv')
-    combined_df = load_combined_data(combined_file_path)
-    range_df = load_range_data(range_file_path)
-    
-    # Create overlay plot
-    overlay_save_path = os.path.join(output_folder, 'overlayed_c2_value_and_ranges.png')
-    create_overlay_plot(combined_df, range_df, overlay_save_path)
+
+    stages = report_stages(input_folder, output_folder)
+    state_path = os.path.join(output_folder, pipeline.state_file)
+    return pipeline.Pipeline(stages, state_path, workers).run(force=force)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Combines the C2 values, computes hourly medians and plots them.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Runs independent stages in parallel threads (figures are then only saved, not shown)")
+    parser.add_argument("--force", action="store_true", help="Reruns every stage even if its inputs did not change")
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # pyplot logus var atvērt tikai galvenajā pavedienā
+        plt.switch_backend('Agg')
+    with profiling.session(args.profile):
+        main(args.workers, args.force)
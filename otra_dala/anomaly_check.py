@@ -4,21 +4,43 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy.signal import find_peaks
 import os
+import argparse
+import spectrum_store
+import plotting
+import profiling
 
 # Failu ceļš (aizstājiet ar pareizo ceļu, ja nepieciešams)
 file_path = "/home/arce/motor_noise.xlsx"
+results_dir = "/home/arce/results/"
 
-# Iegūstiet pamatfaila nosaukumu bez paplašinājuma
-file_base_name = os.path.splitext(os.path.basename(file_path))[0]
+# Direktorija ne-NaN apgabalu teksta failu saglabāšanai
+txt_dir = "/home/arce/results/non_nan_regions/"
+
+# Piku meklēšanas parametri
+peak_prominence = 1
+peak_distance = 10
+buffer = 5  # Punktu skaits ap piku, ko arī iestatīt uz NaN
+
+def find_spectrum_peaks(data):
+    # Atrod pikus ar pielāgotu prominenci un attālumu
+    peaks, _ = find_peaks(data, prominence=peak_prominence, distance=peak_distance)  # Pielāgojiet šos parametrus pēc nepieciešamības
+    return peaks
 
-# Nolasiet Excel failu
-df = pd.read_excel(file_path)
+def peak_regions_mask(shape, rows, peaks, buffer=buffer):
+    """
+    Izveido masku (True = piks vai buferis ap to) vairākiem spektriem vienlaicīgi.
+    rows un peaks ir vienāda garuma masīvi: spektra numurs un pika indekss tajā.
+    Intervāli [pīks - buffer, pīks + buffer] tiek apvienoti ar kumulatīvo summu.
+    """
+    n_rows, n_bins = shape
+    # Pārliecinieties, ka robežas neiziet ārpus diapazona
+    starts = np.maximum(peaks - buffer, 0) + rows * n_bins
+    ends = np.minimum(peaks + buffer, n_bins - 1) + 1 + rows * n_bins
 
-# Pārliecinieties, ka kolonnu nosaukumi ir pareizi
-if 'Frequency (Hz)' in df.columns and 'Motor Noise' in df.columns:
-    df = df.rename(columns={'Frequency (Hz)': 'Frequency', 'Motor Noise': 'Motor_Noise'})
-elif 'Frequency' not in df.columns or 'Motor_Noise' not in df.columns:
-    raise ValueError("Gaidāmās kolonnas 'Frequency (Hz)' un 'Motor Noise' netika atrastas Excel failā")
+    delta = np.zeros(n_rows * n_bins + 1, dtype=np.int32)
+    np.add.at(delta, starts, 1)
+    np.add.at(delta, ends, -1)
+    return (np.cumsum(delta[:-1]) > 0).reshape(n_rows, n_bins)
 
 def motor_noise_analysis(data):
     """
@@ -27,105 +49,166 @@ def motor_noise_analysis(data):
     2. Noņem piku apgabalus, nosakot tos uz NaN.
     3. Atgriež oriģinālos datus, modificētos datus bez pikiem un piku apgabalus.
     """
-    # Atrod pikus ar pielāgotu prominenci un attālumu
-    peaks, _ = find_peaks(data, prominence=1, distance=10)  # Pielāgojiet šos parametrus pēc nepieciešamības
-
-    # Inicializē masīvu, lai turētu datus bez pikiem
-    data_without_peaks = data.copy()
-    
-    # Iestatiet piku apgabalus (un dažas buferes ap tiem) uz NaN
-    buffer = 5  # Punktu skaits ap piku, ko arī iestatīt uz NaN
-    peak_regions = []
-    for peak in peaks:
-        # Pārliecinieties, ka robežas neiziet ārpus diapazona
-        start = max(peak - buffer, 0)
-        end = min(peak + buffer, len(data) - 1)
-        # Saglabā sākuma un beigu indeksus piku apgabalā
-        peak_regions.append((start, end))
-        # Iestata datus šajā diapazonā uz NaN
-        data_without_peaks[start:end+1] = np.nan
-    
-    return data, data_without_peaks, peak_regions
+    peaks = find_spectrum_peaks(data)
 
-# Veic analīzi
-original_data = df['Motor_Noise'].values
-frequency = df['Frequency'].values
-original_data, data_without_peaks, peak_regions = motor_noise_analysis(original_data)
-
-# Izveido pirmo figūru
-plt.figure(figsize=(12, 6))
-
-# Uzzīmē oriģinālos datus zaļā krāsā
-plt.plot(frequency, original_data, color='green', label='Sākotnējie dati')
-
-# Uzzīmē datus bez pikiem sarkanā krāsā
-plt.plot(frequency, data_without_peaks, color='red', label='Dati bez pikiem')
-
-# Pievieno marķierus piku apgabalu sākumam un beigām
-for start, end in peak_regions:
-    plt.scatter(frequency[start], original_data[start], color='green', marker='o', zorder=5, label='Pika Sākums' if start == peak_regions[0][0] else "")
-    plt.scatter(frequency[end], original_data[end], color='red', marker='o', zorder=5, label='Pika Beigas' if end == peak_regions[0][1] else "")
-
-plt.legend()
-plt.title('Motora troksņa analīze ar noņemtiem pikiem')
-plt.xlabel('Frekvence (Hz)')
-plt.ylabel('Motora troksnis (dB)')
-plt.grid(True)
-plt.tight_layout()
-
-# Saglabā pirmo zīmējumu
-plot1_save_path = f"/home/arce/results/{file_base_name}_analysis.png"
-plt.savefig(plot1_save_path)
-
-# Rāda pirmo zīmējumu
-plt.show()
-
-# Izveido otro figūru tikai ar datiem bez pikiem
-plt.figure(figsize=(12, 6))
-
-# Uzzīmē datus bez pikiem sarkanā krāsā
-plt.plot(frequency, data_without_peaks, color='red', label='Dati bez pikiem')
-
-plt.legend()
-plt.title('Motora troksņa analīze: dati bez pikiem')
-plt.xlabel('Frekvence (Hz)')
-plt.ylabel('Motora troksnis (dB)')
-plt.grid(True)
-plt.tight_layout()
-
-# Saglabā otro zīmējumu
-plot2_save_path = f"/home/arce/results/{file_base_name}_analysis_only_peaks_removed.png"
-plt.savefig(plot2_save_path)
-
-# Rāda otro zīmējumu
-plt.show()
-
-# ---- Eksportē Ne-NaN Datu Apgabalus uz Teksta Failu ----
-# Identificē un eksportē apgabalus, kur dati nav NaN (attiecībā uz "Datiem bez pikiem")
-non_nan_regions = []
-current_start = None
-for i in range(len(data_without_peaks)):
-    if not np.isnan(data_without_peaks[i]):
-        if current_start is None:
-            current_start = i
-    else:
-        if current_start is not None:
-            non_nan_regions.append((frequency[current_start], frequency[i - 1]))
-            current_start = None
-# Apstrādā gadījumu, kad pēdējais apgabals stiepjas līdz datu beigām
-if current_start is not None:
-    non_nan_regions.append((frequency[current_start], frequency[-1]))
-
-# Formatē ne-NaN apgabalus teksta izvadei
-non_nan_regions_txt = "\n".join([f"No {start:.2f} Hz līdz {end:.2f} Hz" for start, end in non_nan_regions])
-
-# Direktorija ne-NaN apgabalu teksta faila saglabāšanai
-txt_dir = "/home/arce/results/non_nan_regions/"
-os.makedirs(txt_dir, exist_ok=True)
+    # Saglabā sākuma un beigu indeksus piku apgabalā
+    starts = np.maximum(peaks - buffer, 0)
+    ends = np.minimum(peaks + buffer, len(data) - 1)
+    peak_regions = list(zip(starts, ends))
+
+    # Iestata piku apgabalus (un dažas buferes ap tiem) uz NaN
+    mask = peak_regions_mask((1, len(data)), np.zeros_like(peaks), peaks)[0]
+    data_without_peaks = np.where(mask, np.nan, data)
 
-# Eksportē uz TXT, izmantojot sākotnējā faila nosaukumu
-txt_save_path = os.path.join(txt_dir, f"{file_base_name}_non_nan_regions.txt")
-with open(txt_save_path, 'w') as f:
-    f.write(non_nan_regions_txt)
+    return data, data_without_peaks, peak_regions
 
-print(f"Ne-NaN apgabali veiksmīgi eksportēti uz {txt_save_path}!")
+def non_nan_regions(valid):
+    """
+    Atrod nepārtrauktus apgabalus, kur valid ir True, katrā rindā.
+    Atgriež (rinda, sākuma indekss, beigu indekss) masīvus; beigas ieskaitot.
+    """
+    valid = np.atleast_2d(valid)
+    padded = np.zeros((valid.shape[0], valid.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = valid
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends - 1
+
+def format_regions(frequency, starts, ends):
+    # Formatē ne-NaN apgabalus teksta izvadei
+    return "\n".join([f"No {frequency[start]:.2f} Hz līdz {frequency[end]:.2f} Hz" for start, end in zip(starts, ends)])
+
+def analyze_batch(input_dir, txt_dir=txt_dir):
+    """
+    Apstrādā visus spektrus no csv_converter izvades (CSV direktorija vai binārā krātuve)
+    vienā piegājienā: katram failam saglabā _non_nan_regions.txt un visiem kopā
+    apvienotu apgabalu tabulu non_nan_regions.csv.
+    """
+    names, frequency, spectra = spectrum_store.load_spectra(input_dir)
+    spectra = np.asarray(spectra, dtype=np.float64)
+    print(f"Nolasīti {len(names)} spektri no {input_dir}")
+
+    # find_peaks strādā ar vienu spektru, bet maskas un apgabali tiek aprēķināti visiem kopā
+    peaks = [find_spectrum_peaks(data) for data in spectra]
+    rows = np.repeat(np.arange(len(peaks)), [len(p) for p in peaks])
+    all_peaks = np.concatenate(peaks) if peaks else np.empty(0, dtype=np.intp)
+    mask = peak_regions_mask(spectra.shape, rows, all_peaks)
+
+    region_rows, region_starts, region_ends = non_nan_regions(~mask & ~np.isnan(spectra))
+    bounds = np.searchsorted(region_rows, np.arange(len(names) + 1))
+
+    os.makedirs(txt_dir, exist_ok=True)
+    for i, name in enumerate(names):
+        part = slice(bounds[i], bounds[i + 1])
+        txt_save_path = os.path.join(txt_dir, f"{name}_non_nan_regions.txt")
+        with open(txt_save_path, 'w') as f:
+            f.write(format_regions(frequency, region_starts[part], region_ends[part]))
+
+    region_table = pd.DataFrame({
+        'File': np.array(names, dtype=object)[region_rows],
+        'Region': np.arange(len(region_rows)) - bounds[region_rows] + 1,
+        'Start (Hz)': frequency[region_starts],
+        'End (Hz)': frequency[region_ends],
+    })
+    table_path = os.path.join(txt_dir, "non_nan_regions.csv")
+    region_table.to_csv(table_path, index=False)
+
+    print(f"Ne-NaN apgabali {len(names)} failiem eksportēti uz {txt_dir}, kopējā tabula: {table_path}")
+    return region_table
+
+def analyze_excel(file_path):
+    # Iegūstiet pamatfaila nosaukumu bez paplašinājuma
+    file_base_name = os.path.splitext(os.path.basename(file_path))[0]
+
+    # Nolasiet Excel failu
+    df = pd.read_excel(file_path)
+
+    # Pārliecinieties, ka kolonnu nosaukumi ir pareizi
+    if 'Frequency (Hz)' in df.columns and 'Motor Noise' in df.columns:
+        df = df.rename(columns={'Frequency (Hz)': 'Frequency', 'Motor Noise': 'Motor_Noise'})
+    elif 'Frequency' not in df.columns or 'Motor_Noise' not in df.columns:
+        raise ValueError("Gaidāmās kolonnas 'Frequency (Hz)' un 'Motor Noise' netika atrastas Excel failā")
+
+    # Veic analīzi
+    original_data = df['Motor_Noise'].values
+    frequency = df['Frequency'].values
+    original_data, data_without_peaks, peak_regions = motor_noise_analysis(original_data)
+
+    # Izveido pirmo figūru
+    plt.figure(figsize=(12, 6))
+
+    # Uzzīmē oriģinālos datus zaļā krāsā
+    plt.plot(frequency, original_data, color='green', label='Sākotnējie dati')
+
+    # Uzzīmē datus bez pikiem sarkanā krāsā
+    plt.plot(frequency, data_without_peaks, color='red', label='Dati bez pikiem')
+
+    # Pievieno marķierus piku apgabalu sākumam un beigām
+    for start, end in peak_regions:
+        plt.scatter(frequency[start], original_data[start], color='green', marker='o', zorder=5, label='Pika Sākums' if start == peak_regions[0][0] else "")
+        plt.scatter(frequency[end], original_data[end], color='red', marker='o', zorder=5, label='Pika Beigas' if end == peak_regions[0][1] else "")
+
+    plt.legend()
+    plt.title('Motora troksņa analīze ar noņemtiem pikiem')
+    plt.xlabel('Frekvence (Hz)')
+    plt.ylabel('Motora troksnis (dB)')
+    plt.grid(True)
+    plt.tight_layout()
+
+    # Saglabā pirmo zīmējumu
+    plot1_save_path = os.path.join(results_dir, f"{file_base_name}_analysis.png")
+    plt.savefig(plot1_save_path)
+
+    # Rāda pirmo zīmējumu
+    plotting.finish_figure()
+
+    # Izveido otro figūru tikai ar datiem bez pikiem
+    plt.figure(figsize=(12, 6))
+
+    # Uzzīmē datus bez pikiem sarkanā krāsā
+    plt.plot(frequency, data_without_peaks, color='red', label='Dati bez pikiem')
+
+    plt.legend()
+    plt.title('Motora troksņa analīze: dati bez pikiem')
+    plt.xlabel('Frekvence (Hz)')
+    plt.ylabel('Motora troksnis (dB)')
+    plt.grid(True)
+    plt.tight_layout()
+
+    # Saglabā otro zīmējumu
+    plot2_save_path = os.path.join(results_dir, f"{file_base_name}_analysis_only_peaks_removed.png")
+    plt.savefig(plot2_save_path)
+
+    # Rāda otro zīmējumu
+    plotting.finish_figure()
+
+    # ---- Eksportē Ne-NaN Datu Apgabalus uz Teksta Failu ----
+    # Identificē un eksportē apgabalus, kur dati nav NaN (attiecībā uz "Datiem bez pikiem")
+    _, starts, ends = non_nan_regions(~np.isnan(data_without_peaks))
+    non_nan_regions_txt = format_regions(frequency, starts, ends)
+
+    os.makedirs(txt_dir, exist_ok=True)
+
+    # Eksportē uz TXT, izmantojot sākotnējā faila nosaukumu
+    txt_save_path = os.path.join(txt_dir, f"{file_base_name}_non_nan_regions.txt")
+    with open(txt_save_path, 'w') as f:
+        f.write(non_nan_regions_txt)
+
+    print(f"Ne-NaN apgabali veiksmīgi eksportēti uz {txt_save_path}!")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Motora troksņa piku noņemšana un ne-NaN apgabalu eksports")
+    parser.add_argument("--batch", metavar="INPUT_DIR", default=None,
+                        help="Apstrādā visus spektrus no csv_converter izvades (CSV direktorija vai krātuve)")
+    parser.add_argument("--file", default=file_path, help="Excel fails ar vienu spektru")
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+
+    with profiling.session(args.profile):
+        if args.batch is not None:
+            with profiling.stage('analyze_batch'):
+                analyze_batch(args.batch)
+        else:
+            with profiling.stage('analyze_excel'):
+                analyze_excel(args.file)
@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import argparse
+
+# Bez displeja: Agg jāizvēlas pirms pyplot importa (arī apakšprocesos)
+os.environ['MPLBACKEND'] = 'Agg'
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import Vajag_Apvienot
+import combined_median
+import median_graph
+import range_median
+import anomaly_check
+import profiling
+
+def _init_worker(profile_path=None, profile_run=None):
+    matplotlib.use('Agg')
+    profiling.init_worker(profile_path, profile_run)
+
+def render_job(name, func, args):
+    """Runs one figure job and returns (name, seconds, error message or None)."""
+    start = time.perf_counter()
+    try:
+        with profiling.stage('figure_job', job=name):
+            func(*args)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        plt.close('all')
+    return name, time.perf_counter() - start, error
+
+def report_jobs(base_path, excel_files=()):
+    """
+    Lists the independent figure jobs of the nightly report as (name, function, args).
+    Jobs whose input data does not exist are left out; no two jobs write the same PNG.
+    """
+    output_folder = os.path.join(base_path, 'median_results')
+    hourly_csv = os.path.join(output_folder, 'hourly_medians_c2_values.csv')
+    jobs = []
+
+    if os.path.exists(hourly_csv):
+        jobs.append(('c2_value_vs_datetime', Vajag_Apvienot.create_plot, (hourly_csv, output_folder)))
+
+        # Pārklājuma attēls izmanto tās pašas stundas mediānas, tāpēc tas nav atkarīgs no create_plot izvades
+        combined_df = Vajag_Apvienot.load_combined_data(hourly_csv).sort_values('Datetime')
+        range_df = Vajag_Apvienot.load_range_data(hourly_csv)
+        jobs.append(('overlay', Vajag_Apvienot.create_overlay_plot,
+                     (combined_df, range_df, os.path.join(output_folder, 'overlayed_c2_value_and_ranges.png'))))
+
+        # combined_median.py zīmē to pašu faila nosaukumu, tāpēc tam ir sava apakšmape
+        vertical_folder = os.path.join(output_folder, 'combined_median')
+        os.makedirs(vertical_folder, exist_ok=True)
+        jobs.append(('c2_value_vs_datetime_vertical', combined_median.create_plot, (hourly_csv, vertical_folder)))
+
+    if os.path.exists(median_graph.input_file):
+        jobs.append(('median_graph', median_graph.create_plot, (median_graph.input_file, median_graph.output_folder)))
+
+    if os.path.isdir(range_median.folder_path):
+        jobs.append(('median_motor_noise_across_files', range_median.create_plot,
+                     (range_median.folder_path, range_median.plot_save_path)))
+
+    for file_path in excel_files:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        jobs.append((f'{name}_analysis', anomaly_check.analyze_excel, (file_path,)))
+
+    return jobs
+
+def render_all(jobs, workers=None):
+    """Renders the jobs on a process pool and prints each job's time as it finishes; returns the failed jobs."""
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    timings = []
+    failures = []
+
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(jobs), 1)), initializer=_init_worker,
+                             initargs=profiling.worker_args()) as executor:
+        futures = [executor.submit(render_job, name, func, args) for name, func, args in jobs]
+        for future in as_completed(futures):
+            name, seconds, error = future.result()
+            timings.append(seconds)
+            if error is None:
+                print(f"{name:<40} {seconds:8.2f} s")
+            else:
+                failures.append((name, error))
+                print(f"{name:<40} {seconds:8.2f} s   FAILED: {error}")
+
+    wall = time.perf_counter() - start
+    print(f"{len(jobs)} figure job(s), {len(failures)} failed: {wall:.2f} s wall, "
+          f"{sum(timings):.2f} s total render time on {workers} worker(s)")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Renders all report figures headless (Agg) on a process pool.")
+    parser.add_argument("--base", default='/home/arce', help="Base folder (as in Vajag_Apvienot.py)")
+    parser.add_argument("--excel", nargs='*', default=[], help="Motor noise Excel files for anomaly_check.py figures")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes (all cores by default)")
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+
+    jobs = report_jobs(args.base, args.excel)
+    if not jobs:
+        print("No figure inputs found.")
+        sys.exit(1)
+    with profiling.session(args.profile):
+        failures = render_all(jobs, args.workers)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
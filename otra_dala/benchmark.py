@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import platform
+import argparse
+import tempfile
+import datetime
+import tracemalloc
+import contextlib
+import numpy as np
+import pandas as pd
+
+import csv_converter
+import spectrum_store
+from frequency_bands import band_median_matrix
+import Vajag_Apvienot
+
+def recording_names(count, start=datetime.datetime(2024, 6, 25, 9, 40), interval_s=60):
+    """Returns count YYYY_MM_DD___HH-MM-SS names spaced interval_s apart."""
+    return [(start + datetime.timedelta(seconds=i * interval_s)).strftime('%Y_%m_%d___%H-%M-%S') for i in range(count)]
+
+def synthetic_signal(samples, rng):
+    """Motor-like int16 signal: a few tones (incl. 18 kHz) plus broadband noise."""
+    t = np.arange(samples) / csv_converter.samp_rate
+    signal = rng.normal(0, 300, samples)
+    for freq, amplitude in ((750, 6000), (2250, 1500), (18000, 800), (30000, 400)):
+        signal += amplitude * rng.uniform(0.8, 1.2) * np.sin(2 * np.pi * freq * t + rng.uniform(0, 2 * np.pi))
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+def generate_recordings(folder, count, duration_s, seed=0):
+    """Writes count synthetic 96 kHz int16 .bin recordings of duration_s seconds."""
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    samples = int(duration_s * csv_converter.samp_rate)
+    for name in recording_names(count):
+        synthetic_signal(samples, rng).tofile(os.path.join(folder, name + '.bin'))
+    return folder
+
+def generate_spectrum_csvs(folder, count, seed=0):
+    """Writes count spectrum CSVs in the csv_output layout (header, C2 row, 257 frequency/power rows)."""
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    frequencies = np.fft.rfftfreq(512, 1 / csv_converter.samp_rate)
+    base = rng.normal(-20, 8, frequencies.size)
+    idx_18000 = np.argmin(np.abs(frequencies - 18000))
+    for name in recording_names(count):
+        power = base + rng.normal(0, 2, frequencies.size)
+        with open(os.path.join(folder, name + '.csv'), 'w', encoding='utf-8') as f:
+            f.write('Frequency (Hz),Power spectrum (dB),18000 Hz Value,Comment\n')
+            f.write(f',,{float(power[idx_18000])!r},No comment available\n')
+            f.writelines(f'{freq!r},{value!r},\n' for freq, value in zip(frequencies.tolist(), power.tolist()))
+    return folder
+
+def measure(stage, func, repeat=3, **params):
+    """Times func (best and median of repeat runs) and records its tracemalloc peak in a separate run."""
+    timings = []
+    # The pipeline functions print a line per file; keep that out of the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    result = {'stage': stage, 'best_s': min(timings), 'median_s': float(np.median(timings)),
+              'peak_bytes': peak, 'repeat': repeat, **params}
+    print(f"{stage:<32} best {result['best_s'] * 1000:10.2f} ms   peak {peak / 2**20:8.2f} MiB")
+    return result
+
+def run_benchmarks(workdir, recordings=4, duration_s=60.0, csv_count=2000, repeat=3):
+    """Generates the synthetic data set in workdir and benchmarks every pipeline stage."""
+    bin_dir = generate_recordings(os.path.join(workdir, 'bin'), recordings, duration_s)
+    csv_dir = generate_spectrum_csvs(os.path.join(workdir, 'csv'), csv_count)
+    out_dir = os.path.join(workdir, 'out')
+    os.makedirs(out_dir, exist_ok=True)
+
+    bin_files = sorted(f for f in os.listdir(bin_dir) if f.endswith('.bin'))
+    first_bin = os.path.join(bin_dir, bin_files[0])
+    data = np.fromfile(first_bin, dtype=csv_converter.buffer_format)
+    frequencies, spectrum_data = csv_converter.spectrum(data)
+    engine = csv_converter.SpectrumEngine()
+
+    recording = {'samples': int(data.size), 'duration_s': duration_s}
+    results = [
+        measure('spectrum', lambda: csv_converter.spectrum(data), repeat, **recording),
+        measure('spectrum_stream', lambda: csv_converter.spectrum_stream(first_bin), repeat, **recording),
+        measure('SpectrumEngine.spectrum', lambda: engine.spectrum(data), repeat, **recording),
+        measure('write_spectrum_csv',
+                lambda: csv_converter.write_spectrum_csv(out_dir, bin_files[0], frequencies, spectrum_data), repeat),
+    ]
+
+    def convert_all():
+        # Drop the manifest so that every run converts all recordings again
+        manifest_path = os.path.join(out_dir, csv_converter.manifest_file)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        csv_converter.process_bin_files(bin_dir, out_dir)
+
+    results.append(measure('process_bin_files', convert_all, repeat, recordings=recordings, **recording))
+
+    spectra_params = {'files': csv_count}
+    results.append(measure('load_spectra', lambda: spectrum_store.load_spectra(csv_dir), repeat, **spectra_params))
+    names, csv_frequencies, spectra = spectrum_store.load_spectra(csv_dir)
+    results.append(measure('band_median_matrix', lambda: band_median_matrix(csv_frequencies, spectra), repeat,
+                           **spectra_params))
+
+    def band_medians_from_csvs():
+        # What 12_median_filter.py does before writing: read every spectrum, then all band medians
+        _, file_frequencies, file_spectra = spectrum_store.load_spectra(csv_dir)
+        return band_median_matrix(file_frequencies, file_spectra)
+
+    results.append(measure('load_spectra+band_median_matrix', band_medians_from_csvs, repeat, **spectra_params))
+    results.append(measure('process_folder', lambda: Vajag_Apvienot.process_folder(csv_dir, out_dir), repeat,
+                           **spectra_params))
+
+    combined_csv = os.path.join(out_dir, 'combined_c2_values.csv')
+    results.append(measure('calculate_hourly_medians',
+                           lambda: Vajag_Apvienot.calculate_hourly_medians(combined_csv, out_dir), repeat,
+                           **spectra_params))
+
+    c2_df = pd.read_csv(combined_csv)
+    c2_df['Datetime'] = pd.to_datetime(c2_df['Filename'], format='%Y.%m.%d_%H:%M:%S')
+    results.append(measure('compute_daily_ranges', lambda: Vajag_Apvienot.compute_daily_ranges(c2_df.copy()), repeat,
+                           rows=len(c2_df)))
+
+    results.append(measure('calculate_sliding_medians',
+                           lambda: Vajag_Apvienot.calculate_sliding_medians(combined_csv, out_dir), repeat,
+                           rows=len(c2_df)))
+    return results
+
+def compare(results, previous_path):
+    """Prints the best-time ratio of each stage against a previous results file."""
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = {r['stage']: r for r in json.load(f)['results']}
+    for result in results:
+        before = previous.get(result['stage'])
+        if before is not None:
+            print(f"{result['stage']:<32} {result['best_s'] / before['best_s']:6.2f}x time   "
+                  f"{result['peak_bytes'] / max(before['peak_bytes'], 1):6.2f}x memory")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the spectrum pipeline on synthetic recordings.")
+    parser.add_argument("--recordings", type=int, default=4, help="Number of synthetic .bin recordings")
+    parser.add_argument("--duration", type=float, default=60.0, help="Length of each recording in seconds")
+    parser.add_argument("--csvs", type=int, default=2000, help="Number of synthetic spectrum CSV files")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--workdir", default=None, help="Where to generate data (temporary folder by default)")
+    parser.add_argument("--output", default="benchmark_results.json", help="Machine-readable results file")
+    parser.add_argument("--compare", default=None, help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        results = run_benchmarks(workdir, args.recordings, args.duration, args.csvs, args.repeat)
+
+    report = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
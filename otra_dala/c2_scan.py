@@ -0,0 +1,99 @@
+import os
+import csv
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import spectrum_store
+
+# Viena ieraksta laiks un C2 vērtība
+c2_dtype = np.dtype([('timestamp', '<M8[s]'), ('c2_value', '<f8')])
+
+def read_c2_value(file_path):
+    """
+    Reads the C2 value from the header and first data row only (None if there is no 'Value' column).
+    A missing or blank cell gives NaN, as pd.read_csv did.
+    """
+    with open(file_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        first_row = next(reader, [])
+
+    c2_column = next((i for i, col in enumerate(header) if 'Value' in col), None)
+    if c2_column is None:
+        return None
+    if c2_column >= len(first_row) or not first_row[c2_column].strip():
+        return np.nan
+    return float(first_row[c2_column])
+
+def _read_c2_job(file_path):
+    # Pavedienu darba funkcija: kļūdas tiek atgrieztas, nevis izmestas
+    try:
+        return read_c2_value(file_path), None
+    except Exception as e:
+        return None, e
+
+def scan_c2_values(folder_path, workers=8):
+    """Returns a time-sorted c2_dtype array for a folder of spectrum CSVs or a spectrum store."""
+    if spectrum_store.is_store(folder_path):
+        _, index, _ = spectrum_store.load_store(folder_path)
+        values = np.empty(len(index), dtype=c2_dtype)
+        values['timestamp'] = index['timestamp']
+        values['c2_value'] = index['c2_value']
+        values = values[~np.isnat(values['timestamp'])]
+        return values[np.argsort(values['timestamp'], kind='stable')]
+
+    csv_files = [f for f in os.listdir(folder_path) if f.endswith('.csv')]
+    print(f"Number of files in {folder_path}: {len(csv_files)}")
+
+    # Laika zīmogs no faila nosaukuma tiek nolasīts tikai vienu reizi
+    timestamps = [spectrum_store.parse_timestamp(f) for f in csv_files]
+    for filename, timestamp in zip(csv_files, timestamps):
+        if np.isnat(timestamp):
+            print(f"Unable to parse timestamp from {filename}")
+    csv_files = [f for f, timestamp in zip(csv_files, timestamps) if not np.isnat(timestamp)]
+    timestamps = np.array([t for t in timestamps if not np.isnat(t)], dtype='<M8[s]')
+
+    paths = [os.path.join(folder_path, f) for f in csv_files]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_read_c2_job, paths))
+
+    keep = np.zeros(len(csv_files), dtype=bool)
+    c2_values = np.full(len(csv_files), np.nan)
+    for i, (filename, (value, error)) in enumerate(zip(csv_files, results)):
+        if error is not None:
+            print(f"Error processing {filename}: {error}")
+        elif value is None:
+            print(f"No 'Value' column found in {filename}")
+        else:
+            keep[i] = True
+            c2_values[i] = value
+
+    values = np.empty(keep.sum(), dtype=c2_dtype)
+    values['timestamp'] = timestamps[keep]
+    values['c2_value'] = c2_values[keep]
+    return values[np.argsort(values['timestamp'], kind='stable')]
+
+def c2_filenames(values):
+    """Formats the timestamps as YYYY.MM.DD_HH:MM:SS, the 'Filename' column of combined_c2_values.csv."""
+    iso = np.datetime_as_string(values['timestamp'], unit='s')
+    return [s.replace('-', '.').replace('T', '_') for s in iso]
+
+def load_combined_c2_values(csv_path):
+    """Reads combined_c2_values.csv back into a c2_dtype array (empty cells become NaN)."""
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        rows = [row for row in reader if row]
+    values = np.empty(len(rows), dtype=c2_dtype)
+    # YYYY.MM.DD_HH:MM:SS -> YYYY-MM-DDTHH:MM:SS
+    values['timestamp'] = [row[0].replace('.', '-').replace('_', 'T') for row in rows]
+    values['c2_value'] = [float(row[1]) if len(row) > 1 and row[1] else np.nan for row in rows]
+    return values
+
+def save_combined_c2_values(values, csv_path):
+    """Writes combined_c2_values.csv (Filename, C2 Value)."""
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.write('Filename,C2 Value\n')
+        for name, value in zip(c2_filenames(values), values['c2_value']):
+            # Tāpat kā pandas to_csv: NaN tiek ierakstīts kā tukša šūna
+            f.write(f"{name},{'' if np.isnan(value) else repr(float(value))}\n")
+    return csv_path
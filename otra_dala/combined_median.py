@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
 import os
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-import datetime
+import c2_scan
+import plotting
+import maintenance_events
+import profiling
 
 def create_output_folder(base_path):
     output_folder = os.path.join(base_path, "median_results")
@@ -11,40 +15,12 @@ def create_output_folder(base_path):
     return output_folder
 
 def process_folder(folder_path, output_folder):
-    filenames = []
-    c2_values = []
-    
-    # Meklē visus CSV failus norādītajā mapē
-    csv_files = [f for f in os.listdir(folder_path) if f.endswith('.csv')]
-    # Sakārto failus pēc datuma
-    csv_files.sort(key=lambda f: datetime.datetime.strptime(f.split('.')[0].replace('_', ' '), '%Y %m %d %H-%M-%S'))
-    
-    print(f"Failu skaits {folder_path}: {len(csv_files)}")
-    
-    for filename in csv_files:
-        file_path = os.path.join(folder_path, filename)
-        df = pd.read_csv(file_path)
-        # Atrod kolonnu ar nosaukumu, kas satur 'Value'
-        c2_column = next((col for col in df.columns if 'Value' in col), None)
-        
-        if c2_column is not None:
-            date_time_str = filename.split('.')[0].replace('_', ' ')
-            date_time = datetime.datetime.strptime(date_time_str, '%Y %m %d %H-%M-%S')
-            new_filename = date_time.strftime('%Y.%m.%d_%H:%M:%S')
-            filenames.append(new_filename)
-            c2_values.append(df[c2_column].iloc[0])
-        else:
-            print(f"Nav atrasta 'Value' kolonna failā {filename}")
-    
-    # Izveido DataFrame ar failu nosaukumiem un C2 vērtībām
-    data = {'Filename': filenames, 'C2 Value': c2_values}
-    df = pd.DataFrame(data)
-    
+    # Nolasa C2 vērtības no CSV failiem (tikai galvene un pirmā rinda) vai no spektru krātuves
+    values = c2_scan.scan_c2_values(folder_path)
+
     # Saglabā rezultātus CSV failā
     csv_path = os.path.join(output_folder, "combined_c2_values.csv")
-    df.to_csv(csv_path, index=False)
-    
-    return csv_path
+    return c2_scan.save_combined_c2_values(values, csv_path)
 
 def calculate_hourly_medians(csv_path, output_folder):
     df = pd.read_csv(csv_path)
@@ -67,23 +43,32 @@ def create_plot(input_file, output_folder):
     df['Datetime'] = pd.to_datetime(df['Datetime'])
     df = df.sort_values('Datetime')
 
-    fig, ax = plt.subplots(figsize=(22, 12))
-    ax.plot(df['C2 Value'], df['Datetime'], color='gray', alpha=0.5, linewidth=1)
+    output_file = os.path.join(output_folder, 'c2_value_vs_datetime_plot_legend_moved.png')
+    events = maintenance_events.load_events()
+
+    def render():
+        # Zīmē ne vairāk kā minimumu un maksimumu katrai attēla pikseļu rindai (laika ass ir vertikāla)
+        plot_df = plotting.downsample(df, 'Datetime', 'C2 Value', plotting.pixel_width(12, 300))
 
-    # Grupa pēc nedēļas
-    for name, group in df.groupby(df['Datetime'].dt.to_period('W')):
-        ax.scatter(group['C2 Value'], group['Datetime'], label=name.start_time.strftime('%Y-%m-%d'), alpha=0.7)
+        fig, ax = plt.subplots(figsize=(22, 12))
+        ax.plot(plot_df['C2 Value'], plot_df['Datetime'], color='gray', alpha=0.5, linewidth=1)
 
-    customize_plot(ax, fig)
-    add_events(ax, df)
+        # Grupa pēc nedēļas
+        for name, group in plot_df.groupby(plot_df['Datetime'].dt.to_period('W')):
+            ax.scatter(group['C2 Value'], group['Datetime'], label=name.start_time.strftime('%Y-%m-%d'), alpha=0.7)
 
-    plt.tight_layout()
-    plt.subplots_adjust(right=0.85)
+        customize_plot(ax, fig)
+        add_events(ax, df, events)
 
-    output_file = os.path.join(output_folder, 'c2_value_vs_datetime_plot_legend_moved.png')
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
-    print(f"Zīmējums saglabāts kā {output_file}")
-    plt.show()
+        plt.tight_layout()
+        plt.subplots_adjust(right=0.85)
+
+        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+        print(f"Zīmējums saglabāts kā {output_file}")
+        plotting.finish_figure(fig)
+
+    # Ja ievades dati nav mainījušies, attēls netiek zīmēts no jauna
+    plotting.render_cached(output_file, [df, events, 'create_plot'], render)
 
 def customize_plot(ax, fig):
     ax.set_title('Datums un laiks pret C2 vērtībām', fontsize=16)
@@ -95,36 +80,36 @@ def customize_plot(ax, fig):
     fig.autofmt_xdate()
     ax.legend(title='Nedēļas sākums', bbox_to_anchor=(1.05, 1), loc='upper left')
 
-def add_events(ax, df):
-    events = [
-        ('2024-06-25 09:40', "Pievienots #1 gultnim pulveris, RPM mainīts no 300 uz 430"),
-        ('2024-07-09 13:30', "#1 gultnis nedaudz attaukots"),
-        ('2024-07-10 14:16', "Uzstādīts jauns #2 gultnis. Iespējami nelieli bojājumi uzstādīšanas laikā."),
-        ('2024-07-16 12:00', "Tirs motors: Motors atvienots no gultņa"),
-        ('2024-07-16 14:30', "Tirs motors: Pievienota otra ierīce (pelēka)"),
-        ('2024-07-16 15:30', "Tirs motors: Otra ierīce nespēj ierakstīt"),
-        ('2024-07-16 16:37', "#1 gultnis pilnībā attaukots"),
-        ('2024-07-18 17:29', "#1 gultnis ietaukots ar zilo smērvielu"),
-        ('2024-07-19 21:11', "#1 gultnim pievienota keramika ar zilo smērvielu"),
-        ('2024-07-22 13:34', "Tukša telpa: Testi biroja telpā, bez motora")
-    ]
-
-    for date, label in events:
-        event_time = pd.to_datetime(date, format='%Y-%m-%d %H:%M')
-        y_pos = event_time
-        x_pos = df.loc[df['Datetime'] == event_time, 'C2 Value'].values[0] if not df.loc[df['Datetime'] == event_time, 'C2 Value'].empty else ax.get_xlim()[1]
-        ax.annotate(label, (x_pos, y_pos), xytext=(10, 0), textcoords='offset points', 
+def add_events(ax, df, events=None):
+    if events is None:
+        events = maintenance_events.load_events()
+
+    # C2 vērtība tieši notikuma laikā (ja tāda ir), visiem notikumiem vienā searchsorted izsaukumā
+    x_values = maintenance_events.values_at(df['Datetime'].values, df['C2 Value'].values, events['Datetime'].values)
+    for event_time, label, x_pos in zip(events['Datetime'], events['Notikums'], x_values):
+        if pd.isna(x_pos):
+            x_pos = ax.get_xlim()[1]
+        ax.annotate(label, (x_pos, event_time), xytext=(10, 0), textcoords='offset points', 
                     ha='left', va='center', fontsize=8, bbox=dict(boxstyle='round,pad=0.5', fc='yellow', alpha=0.5),
                     arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=0'))
 
 def main():
-    base_path = '/home/arce'
+    parser = argparse.ArgumentParser(description="C2 values, their hourly medians and the C2 vs time plot with maintenance events.")
+    parser.add_argument("--base-path", default='/home/arce', help="Folder with csv_output; results go to median_results in it")
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+
+    base_path = args.base_path
     input_folder = os.path.join(base_path, 'csv_output')
     output_folder = create_output_folder(base_path)
-    
-    csv_path = process_folder(input_folder, output_folder)
-    hourly_medians_csv = calculate_hourly_medians(csv_path, output_folder)
-    create_plot(hourly_medians_csv, output_folder)
+
+    with profiling.session(args.profile):
+        with profiling.stage('process_folder'):
+            csv_path = process_folder(input_folder, output_folder)
+        with profiling.stage('hourly_medians'):
+            hourly_medians_csv = calculate_hourly_medians(csv_path, output_folder)
+        with profiling.stage('create_plot'):
+            create_plot(hourly_medians_csv, output_folder)
 
 if __name__ == "__main__":
     main()
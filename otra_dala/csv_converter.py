@@ -4,14 +4,26 @@ import os
 import csv
 import setproctitle
 import pyfftw
-import sys
+import argparse
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from itertools import repeat
+import spectrum_store
+import spectral_features
+import spectrogram
+import profiling
 
 # Definē visas nepieciešamās mainīgās
 samp_rate = 96000
 buffer_format = np.int16
-start_file = "2024_07_05___17-16-15.bin"  # Norādiet sākuma failu
+start_file = None  # Ja norādīts (piem. "2024_07_05___17-16-15.bin"), agrākie faili tiek izlaisti
+manifest_file = "conversion_manifest.jsonl"  # Jau apstrādāto ierakstu saraksts izejas direktorijā
+stream_block_segments = 2048  # Segmentu skaits vienā straumēšanas blokā
+spectrum_float32_tolerance = 0.01  # Maksimālā SpectrumEngine novirze no spectrum() (dB) ...
+spectrum_float32_range = 70  # ... joslās, kas nav vairāk kā tik dB zem spektra maksimuma
 
-def spectrum(data, segment_size=512):
+def spectrum(data, segment_size=512, sink=None):
     fs = samp_rate
     data = data / 32768.0
 
@@ -30,77 +42,457 @@ def spectrum(data, segment_size=512):
     f = np.fft.rfftfreq(segment_size, 1/fs)
     ref = (1 / np.sqrt(2)) ** 2
     p = 10 * np.log10(Pxx / ref)
+    if sink is not None:
+        sink.add(p)
 
     return f, p.mean(axis=0)
 
-def save_spectrum_to_csv(input_path, output_path, filename, data):
+def spectrum_stream(file_path, segment_size=512, block_segments=stream_block_segments, sink=None):
+    """
+    Aprēķina to pašu spektru kā spectrum(), bet nelādē visu failu atmiņā:
+    fails tiek atvērts kā memmap un apstrādāts blokos pa block_segments
+    pārklājošiem Hamming segmentiem. Atmiņas patēriņu nosaka bloka izmērs,
+    nevis faila izmērs. Nākamais bloks tiek nolasīts fona pavedienā, kamēr
+    tiek rēķināta pašreizējā bloka FFT. Ja dots sink (piem. SpectrogramWriter),
+    tam tiek nodoti katra bloka segmentu spektri (dB).
+    """
+    fs = samp_rate
+    noverlap = segment_size // 2
+    step = segment_size - noverlap
+
+    if os.path.getsize(file_path) == 0:
+        data = np.empty(0, dtype=buffer_format)  # Tukšu failu nevar atvērt kā memmap
+    else:
+        data = np.memmap(file_path, dtype=buffer_format, mode='r')
+    n_segments = max((data.size - noverlap) // step, 0)
+
+    window = np.hamming(segment_size)
+    f = np.fft.rfftfreq(segment_size, 1/fs)
+    ref = (1 / np.sqrt(2)) ** 2
+    p_sum = np.zeros(f.size)
+
+    def read_block(first):
+        # Nolasa segmentus [first, last) kopā ar pārklāšanos nākamajam segmentam
+        last = min(first + block_segments, n_segments)
+        block = np.array(data[first * step:(last - 1) * step + segment_size], dtype=np.float64)
+        block /= 32768.0
+        return block
+
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        pending = reader.submit(read_block, 0) if n_segments > 0 else None
+        for first in range(0, n_segments, block_segments):
+            block = pending.result()
+            next_first = first + block_segments
+            pending = reader.submit(read_block, next_first) if next_first < n_segments else None
+
+            shape = (block.size - noverlap) // step, segment_size
+            strides = step * block.strides[0], block.strides[0]
+            windows = np.lib.stride_tricks.as_strided(block, shape=shape, strides=strides)
+
+            fft_data = pyfftw.interfaces.numpy_fft.rfft(windows * window, n=segment_size)
+            Pxx = np.abs(fft_data)**2
+            p = 10 * np.log10(Pxx / ref)
+            if sink is not None:
+                sink.add(p)
+            p_sum += p.sum(axis=0)
+
+    if n_segments == 0:
+        return f, np.full(f.size, np.nan)  # Tāpat kā p.mean(axis=0) tukšiem datiem
+    return f, p_sum / n_segments
+
+class SpectrumEngine:
+    """
+    Atkārtoti izmantojams float32 spektra aprēķins dotajam segmenta izmēram un
+    diskretizācijas frekvencei. Logs (kopā ar int16 mērogošanu), frekvenču ass,
+    FFTW plāns un visi darba buferi tiek sagatavoti vienreiz, un katrs bloks tiek
+    apstrādāts tajos pašos buferos bez jaunu masīvu izveides. Ievade ir int16
+    masīvs vai memmap. Rezultāts atšķiras no spectrum() ne vairāk kā par
+    spectrum_float32_tolerance dB tajās joslās, kas ir ne vairāk kā spectrum_float32_range dB
+    zem spektra maksimuma. Zemākās joslās (piem. noplūde ap konstantu vai gandrīz klusu signālu,
+    ap -170 dB) float32 noapaļošana dominē un atšķirība var būt desmitiem dB.
+    """
+
+    def __init__(self, segment_size=512, fs=samp_rate, block_segments=stream_block_segments):
+        self.segment_size = segment_size
+        self.noverlap = segment_size // 2
+        self.step = segment_size - self.noverlap
+        self.block_segments = block_segments
+
+        # data / 32768.0 tiek iekļauts logā, bet 10*log10(1/ref) - nobīdē pēc vidējošanas
+        self.window = (np.hamming(segment_size) / 32768.0).astype(np.float32)
+        self.frequencies = np.fft.rfftfreq(segment_size, 1/fs)
+        ref = (1 / np.sqrt(2)) ** 2
+        self.offset = -10 * np.log10(ref)
+
+        self.windowed = pyfftw.empty_aligned((block_segments, segment_size), dtype=np.float32)
+        self.fft_data = pyfftw.empty_aligned((block_segments, segment_size // 2 + 1), dtype=np.complex64)
+        self.power = np.empty(self.fft_data.shape, dtype=np.float32)
+        self.fft = pyfftw.FFTW(self.windowed, self.fft_data, axes=(1,), flags=('FFTW_ESTIMATE',))
+
+    def spectrum(self, data, sink=None):
+        n_segments = max((data.size - self.noverlap) // self.step, 0)
+        if n_segments == 0:
+            return self.frequencies, np.full(self.frequencies.size, np.nan)
+
+        p_sum = np.zeros(self.frequencies.size)
+        for first in range(0, n_segments, self.block_segments):
+            count = min(self.block_segments, n_segments - first)
+            block = data[first * self.step:(first + count - 1) * self.step + self.segment_size]
+            windows = np.lib.stride_tricks.as_strided(block, shape=(count, self.segment_size),
+                                                      strides=(self.step * block.strides[0], block.strides[0]))
+
+            np.multiply(windows, self.window, out=self.windowed[:count])
+            self.fft()
+
+            # |X|^2 un log10 tiek rēķināti vietā tajā pašā buferī
+            power = self.power[:count]
+            np.abs(self.fft_data[:count], out=power)
+            np.square(power, out=power)
+            np.log10(power, out=power)
+            p_sum += power.sum(axis=0, dtype=np.float64)
+            if sink is not None:
+                sink.add(10 * power + self.offset)
+
+        return self.frequencies, 10 * p_sum / n_segments + self.offset
+
+_engines = {}
+
+def get_engine(segment_size=512, block_segments=stream_block_segments):
+    # Katrs process izveido savu SpectrumEngine (FFTW plānus nevar nodot starp procesiem)
+    key = (segment_size, block_segments)
+    if key not in _engines:
+        _engines[key] = SpectrumEngine(segment_size, block_segments=block_segments)
+    return _engines[key]
+
+def write_spectrum_csv(output_path, filename, frequencies, spectrum_data):
+    # Atroda tuvāko frekvenci pie 18000 Hz
+    idx_18000 = np.argmin(np.abs(frequencies - 18000))
+    value_18000 = spectrum_data[idx_18000]
+
+    # Izmanto bin faila nosaukumu (bez paplašinājuma) CSV faila nosaukumam
+    csv_filename = os.path.splitext(filename)[0] + '.csv'
+    csv_filepath = os.path.join(output_path, csv_filename)
+
+    # Raksta pagaidu failā un pārsauc, lai avārija neatstātu pusē pierakstītu CSV
+    tmp_filepath = os.path.join(output_path, '.' + csv_filename + '.tmp')
+    with open(tmp_filepath, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['Frekvence (Hz)', 'Jaudas spektrs (dB)', '18000 Hz Vērtība'])
+        writer.writerow(['', '', f'{value_18000}'])
+        for freq, power in zip(frequencies, spectrum_data):
+            writer.writerow([freq, power, ''])
+    os.replace(tmp_filepath, csv_filepath)
+
+    return csv_filepath
+
+def save_spectrum_to_csv(input_path, output_path, filename, data=None, block_segments=stream_block_segments):
     if not os.path.exists(output_path):
         os.makedirs(output_path)
 
+    csv_filename = os.path.splitext(filename)[0] + '.csv'
     try:
-        frequencies, spectrum_data = spectrum(data)
-        
-        # Atroda tuvāko frekvenci pie 18000 Hz
-        idx_18000 = np.argmin(np.abs(frequencies - 18000))
-        value_18000 = spectrum_data[idx_18000]
-        
-        # Izmanto bin faila nosaukumu (bez paplašinājuma) CSV faila nosaukumam
-        csv_filename = os.path.splitext(filename)[0] + '.csv'
-        csv_filepath = os.path.join(output_path, csv_filename)
-        
-        with open(csv_filepath, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Frekvence (Hz)', 'Jaudas spektrs (dB)', '18000 Hz Vērtība'])
-            writer.writerow(['', '', f'{value_18000}'])
-            for freq, power in zip(frequencies, spectrum_data):
-                writer.writerow([freq, power, ''])
+        if data is None:
+            # Straumēšanas režīms: spektrs tiek rēķināts tieši no faila
+            frequencies, spectrum_data = spectrum_stream(os.path.join(input_path, filename),
+                                                         block_segments=block_segments)
+        else:
+            frequencies, spectrum_data = spectrum(data)
 
+        csv_filepath = write_spectrum_csv(output_path, filename, frequencies, spectrum_data)
         print(f"Spektrs CSV saglabāts: {csv_filepath}")
     except Exception as e:
         print(f"Radās kļūda, veidojot spektra CSV: {e}")
 
     return csv_filename
 
-def process_bin_files(input_path, output_path):
+def open_spectrogram(spectrogram_path, filename, segment_size=512):
+    # Spektrogrammas kadri tiek veidoti no tiem pašiem segmentiem, ko vidējo spectrum()
+    step = segment_size - segment_size // 2
+    return spectrogram.SpectrogramWriter(spectrogram_path, filename, np.fft.rfftfreq(segment_size, 1/samp_rate),
+                                         samp_rate, step, segment_size)
+
+def convert_bin_file(input_path, output_path, filename, stream=False, block_segments=stream_block_segments,
+                     write_csv=True, float32=False, spectrogram_path=None, hasher=None):
+    """
+    Aprēķina viena .bin ieraksta spektru un (ja write_csv) saglabā to CSV failā.
+    Ja dots spectrogram_path, tajā pašā FFT ciklā tiek saglabāta arī saspiesta spektrogramma.
+    Ja dots hasher (piem. hashlib.sha256()), tas tiek papildināts ar tiem pašiem nolasītajiem baitiem,
+    tāpēc failu nav jālasa vēlreiz tikai kontrolsummas dēļ.
+    Atgriež (frekvences, spektrs, CSV ceļš vai None). Kļūdas netiek notvertas,
+    tās apstrādā izsaucējs (sk. _convert_job).
+    """
+    audio_file_path = os.path.join(input_path, filename)
+    mode = 'float32' if float32 else 'stream' if stream else 'memory'
+    # Viens "convert" ieraksts katram failam; iekšējie posmi tiek mērīti atsevišķi
+    with profiling.stage('convert', file=filename, mode=mode, input_bytes=os.path.getsize(audio_file_path)):
+        sink = open_spectrogram(spectrogram_path, filename) if spectrogram_path is not None else None
+
+        try:
+            if float32:
+                # SpectrumEngine lasa int16 datus tieši no memmap pa blokiem (lasīšana ietilpst spectrum posmā)
+                if os.path.getsize(audio_file_path) == 0:
+                    data = np.empty(0, dtype=buffer_format)
+                else:
+                    data = np.memmap(audio_file_path, dtype=buffer_format, mode='r')
+                if hasher is not None:
+                    hasher.update(data)
+                with profiling.stage('spectrum', file=filename, mode=mode):
+                    frequencies, spectrum_data = get_engine(block_segments=block_segments).spectrum(data, sink=sink)
+            elif stream:
+                if hasher is not None and os.path.getsize(audio_file_path):
+                    hasher.update(np.memmap(audio_file_path, dtype=np.uint8, mode='r'))
+                with profiling.stage('spectrum', file=filename, mode=mode):
+                    frequencies, spectrum_data = spectrum_stream(audio_file_path, block_segments=block_segments, sink=sink)
+            else:
+                # Ielādē bināro audio failu
+                with profiling.stage('read', file=filename):
+                    with open(audio_file_path, 'rb') as f:
+                        raw = f.read()
+                    if hasher is not None:
+                        hasher.update(raw)
+                    data = np.frombuffer(raw, dtype=buffer_format)
+                with profiling.stage('spectrum', file=filename, mode=mode):
+                    frequencies, spectrum_data = spectrum(data, sink=sink)
+            if sink is not None:
+                with profiling.stage('spectrogram_write', file=filename):
+                    sink.close()
+        except BaseException:
+            # Kļūdas gadījumā neatstāj atvērtu failu un nepabeigtu .tmp spektrogrammu
+            if sink is not None:
+                sink.abort()
+            raise
+
+        csv_filepath = None
+        if write_csv:
+            with profiling.stage('write_csv', file=filename):
+                csv_filepath = write_spectrum_csv(output_path, filename, frequencies, spectrum_data)
+    return frequencies, spectrum_data, csv_filepath
+
+def file_hash(file_path, chunk_size=1 << 20):
+    # Faila satura SHA-256, nolasot to pa daļām
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(output_path):
+    """
+    Nolasa manifestu: {faila nosaukums: ieraksts}. Vēlāks ieraksts par to pašu
+    failu aizstāj agrāko; nepabeigta rinda pēc avārijas tiek ignorēta.
+    """
+    manifest = {}
+    manifest_path = os.path.join(output_path, manifest_file)
+    if not os.path.exists(manifest_path):
+        return manifest
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            manifest[record['file']] = record
+    return manifest
+
+def append_manifest(output_path, record):
+    # Manifests tiek tikai papildināts, tāpēc katra ieraksta saglabāšana nav atkarīga no vēstures garuma
+    manifest_path = os.path.join(output_path, manifest_file)
+    with open(manifest_path, 'a+b') as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')  # Iepriekšējā rinda palikusi nepabeigta
+        f.write((json.dumps(record) + '\n').encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+
+def requested_outputs(output_path, write_csv=True, store_path=None, features_path=None, spectrogram_path=None):
+    """{izejas veids: absolūtais ceļš} visām izejām, ko pieprasa šī palaišana."""
+    outputs = {'csv': output_path, 'store': store_path, 'features': features_path, 'spectrogram': spectrogram_path}
+    if not write_csv:
+        outputs['csv'] = None
+    return {kind: os.path.abspath(path) for kind, path in outputs.items() if path is not None}
+
+def recorded_outputs(record, output_path):
+    """Izejas, kas manifesta ierakstā atzīmētas kā izveidotas (vecākiem ierakstiem tikai CSV, ja tāds bija)."""
+    if record is None:
+        return {}
+    if 'outputs' in record:
+        return record['outputs']
+    return {'csv': os.path.abspath(output_path)} if record.get('output') is not None else {}
+
+def _convert_job(input_path, output_path, filename, stream, block_segments, write_csv, float32, known_hash=None,
+                 spectrogram_path=None):
+    # Procesu pūla darba funkcija: atgriež (rezultāts, None) vai (None, kļūdas teksts).
+    # Ja saturs sakrīt ar manifestā zināmo (mainījies tikai mtime), rezultāts ir (None, None, None, hash)
+    try:
+        with profiling.stage('hash', file=filename):
+            digest = file_hash(os.path.join(input_path, filename))
+        if digest == known_hash:
+            return (None, None, None, digest), None
+        result = convert_bin_file(input_path, output_path, filename, stream, block_segments, write_csv, float32,
+                                  spectrogram_path)
+        return result + (digest,), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def _init_worker(profile_path, profile_run):
     setproctitle.setproctitle("FFTProcessor")
-    
+    profiling.init_worker(profile_path, profile_run)
+
+def process_bin_files(input_path, output_path, stream=False, block_segments=stream_block_segments, workers=1,
+                      store_path=None, write_csv=True, start_file=start_file, float32=False,
+                      features_path=None, tracked=spectral_features.tracked_frequencies, spectrogram_path=None):
+    setproctitle.setproctitle("FFTProcessor")
+    os.makedirs(output_path, exist_ok=True)
+
     # Saraksta visus .bin failus direktorijā
     all_files = [f for f in os.listdir(input_path) if f.endswith('.bin')]
     all_files.sort()  # Sakārto failus apstrādei secībā
 
-    # Izlaiž failus, līdz sasniedz start_file
-    start_processing = False
+    # Izlaiž failus pirms start_file (nosaukumi ir laika zīmogi, tāpēc pietiek ar salīdzināšanu)
+    if start_file is not None:
+        all_files = [f for f in all_files if f >= start_file]
+
+    # Apstrādā tikai jaunos vai mainītos failus, kā arī tos, kam vēl nav kādas no pieprasītajām izejām
+    # (piem. fails konvertēts bez --store, bet tagad --store ir dots); izmēru un mtime salīdzina bez faila lasīšanas
+    manifest = load_manifest(output_path)
+    requested = requested_outputs(output_path, write_csv, store_path, features_path, spectrogram_path)
+    files, known_hashes, file_stats = [], [], {}
+    missing_outputs = 0
     for filename in all_files:
-        if not start_processing:
-            if filename == start_file:
-                start_processing = True
-            else:
+        stat = os.stat(os.path.join(input_path, filename))
+        record = manifest.get(filename)
+        done = recorded_outputs(record, output_path)
+        complete = all(done.get(kind) == path for kind, path in requested.items())
+        if record is not None and record['size'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns \
+                and complete:
+            continue
+        missing_outputs += record is not None and not complete
+        files.append(filename)
+        # Satura sakritība ļauj izlaist konvertēšanu tikai tad, ja visas izejas jau ir izveidotas
+        known_hashes.append(record['sha256'] if record is not None and complete else None)
+        file_stats[filename] = stat
+
+    print(f"Jauni vai mainīti faili: {len(files)} no {len(all_files)}"
+          + (f" (t.sk. {missing_outputs} bez pieprasītajām izejām)" if missing_outputs else ""))
+
+    pool = None
+    if workers > 1:
+        # Faili tiek sadalīti pa procesiem, bet rezultāti tiek saņemti sakārtotā secībā
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=profiling.worker_args())
+        results = pool.map(_convert_job, repeat(input_path), repeat(output_path), files,
+                           repeat(stream), repeat(block_segments), repeat(write_csv),
+                           repeat(float32), known_hashes, repeat(spectrogram_path))
+    else:
+        results = (_convert_job(input_path, output_path, filename, stream, block_segments, write_csv, float32, known_hash,
+                                spectrogram_path)
+                   for filename, known_hash in zip(files, known_hashes))
+
+    failures = []
+    try:
+        for filename, (result, error) in zip(files, results):
+            print(f"Apstrādā {filename}")
+            if error is not None:
+                print(f"Radās kļūda, veidojot spektra CSV: {error}")
+                failures.append((filename, error))
                 continue
-        
-        print(f"Apstrādā {filename}")
-        
-        # Konstruē pilno ceļu uz bināro audio failu
-        audio_file_path = os.path.join(input_path, filename)
 
-        # Ielādē bināro audio failu
-        with open(audio_file_path, 'rb') as f:
-            data = np.frombuffer(f.read(), dtype=buffer_format)
+            frequencies, spectrum_data, csv_filepath, digest = result
+            if frequencies is None:
+                print(f"Saturs nav mainījies: {filename}")
+            if csv_filepath is not None:
+                print(f"Spektrs CSV saglabāts: {csv_filepath}")
+            if store_path is not None and frequencies is not None:
+                # Krātuvē raksta tikai galvenais process, sakārtotā secībā. Mainīts fails (vai avārija pirms
+                # manifesta ieraksta) pievieno vēl vienu rindu ar to pašu nosaukumu; load_store izmanto jaunāko
+                with profiling.stage('store_append', file=filename):
+                    spectrum_store.append_spectrum(store_path, filename, frequencies, spectrum_data)
+                print(f"Spektrs pievienots krātuvei: {store_path}")
+            if features_path is not None and frequencies is not None:
+                # Pazīmes tiek aprēķinātas no tā paša spektra, bez atkārtotas CSV nolasīšanas
+                with profiling.stage('features_append', file=filename):
+                    records = spectral_features.compute_features([filename], frequencies, [spectrum_data], tracked)
+                    spectral_features.append_features(features_path, records)
+
+            # Manifestā ieraksta tikai pēc tam, kad izejas faili ir pilnībā saglabāti. Ja saturs nav mainījies,
+            # iepriekš izveidotās izejas joprojām ir derīgas; citādi derīgas ir tikai šajā reizē izveidotās
+            stat = file_stats[filename]
+            previous = manifest.get(filename)
+            unchanged = previous is not None and previous.get('sha256') == digest
+            outputs = dict(recorded_outputs(previous, output_path)) if unchanged else {}
+            if frequencies is not None:
+                outputs.update(requested)
+            output = previous.get('output') if unchanged else None
+            if csv_filepath is not None:
+                output = os.path.basename(csv_filepath)
+            with profiling.stage('manifest_append', file=filename):
+                append_manifest(output_path, {
+                    'file': filename,
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'sha256': digest,
+                    'output': output,
+                    'outputs': outputs,
+                })
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
-        # Apstrādā datus un saglabā spektru CSV failā
-        save_spectrum_to_csv(input_path, output_path, filename, data)
+    # Kopsavilkums par visiem failiem
+    print(f"Apstrādāti {len(files) - len(failures)} no {len(files)} failiem, kļūdas: {len(failures)}")
+    for filename, error in failures:
+        print(f"  {filename}: {error}")
 
-def main(folder_path):
+    return failures
+
+def main(folder_path, stream=False, block_segments=stream_block_segments, workers=1, store_path=None,
+         write_csv=True, start_file=start_file, float32=False, features_path=None,
+         tracked=spectral_features.tracked_frequencies, spectrogram_path=None):
     # Izveido izejas direktoriju lietotāja mājas direktorijā
     home_dir = os.path.expanduser("~")
     output_path = os.path.join(home_dir, 'csv_output')
     os.makedirs(output_path, exist_ok=True)
     
-    process_bin_files(folder_path, output_path)
+    process_bin_files(folder_path, output_path, stream=stream, block_segments=block_segments, workers=workers,
+                      store_path=store_path, write_csv=write_csv, start_file=start_file,
+                      float32=float32, features_path=features_path, tracked=tracked,
+                      spectrogram_path=spectrogram_path)
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Izmantošana: python3 graphs.py <ceļš_uz_direktoriju>")
-        sys.exit(1)
-    
-    folder_path = sys.argv[1]
-    main(folder_path)
+    parser = argparse.ArgumentParser(description="Pārvērš .bin audio ierakstus spektra CSV failos")
+    parser.add_argument("folder_path", help="Direktorija ar .bin ierakstiem")
+    parser.add_argument("--stream", action="store_true",
+                        help="Apstrādā failus blokos caur memmap, neielādējot visu failu atmiņā")
+    parser.add_argument("--block-segments", type=int, default=stream_block_segments,
+                        help="Segmentu skaits vienā straumēšanas blokā")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Paralēli apstrādājamo procesu skaits")
+    parser.add_argument("--store", default=None,
+                        help="Papildus pievieno spektrus binārajai spektru krātuvei šajā direktorijā")
+    parser.add_argument("--no-csv", action="store_true",
+                        help="Neveido CSV failu katram ierakstam (izmantojams kopā ar --store)")
+    parser.add_argument("--start-file", default=start_file,
+                        help="Izlaiž .bin failus, kas sakārtoti pirms šī faila")
+    parser.add_argument("--float32", action="store_true",
+                        help="Izmanto float32 SpectrumEngine ar iepriekš sagatavotiem buferiem "
+                             f"(novirze līdz {spectrum_float32_tolerance} dB joslās, kas ir ne vairāk kā "
+                             f"{spectrum_float32_range} dB zem spektra maksimuma)")
+    parser.add_argument("--features", default=None,
+                        help="Saglabā katra ieraksta pazīmes (izsekotās frekvences, 12 joslu mediānas, "
+                             "kopējā jauda, centroīds, plakanums) šajā direktorijā")
+    parser.add_argument("--track", type=float, nargs='+', default=list(spectral_features.tracked_frequencies),
+                        help="Izsekojamās frekvences (Hz) pazīmju failam")
+    parser.add_argument("--spectrogram", default=None,
+                        help="Saglabā katra ieraksta saspiestu spektrogrammu šajā direktorijā "
+                             f"({spectrogram.time_factor} segmenti x {spectrogram.freq_factor} joslas vienā punktā)")
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+
+    with profiling.session(args.profile):
+        main(args.folder_path, stream=args.stream, block_segments=args.block_segments, workers=args.workers,
+             store_path=args.store, write_csv=not args.no_csv, start_file=args.start_file,
+             float32=args.float32, features_path=args.features, tracked=tuple(args.track),
+             spectrogram_path=args.spectrogram)
@@ -0,0 +1,37 @@
+import numpy as np
+
+# Interesējošie frekvenču diapazoni (Hz), kas tiek izmantoti 12 mediānu analīzē
+frequency_ranges = [
+    (1687.50, 3750.00),
+    (6000.00, 6937.50),
+    (9187.50, 10875.00),
+    (13125.00, 14812.50),
+    (17062.50, 18937.50),
+    (21187.50, 22687.50),
+    (24937.50, 26812.50),
+    (29062.50, 30937.50),
+    (33187.50, 34875.00),
+    (37125.00, 38812.50),
+    (41062.50, 41812.50),
+    (44062.50, 45750.00)
+]
+
+def band_labels(ranges=frequency_ranges):
+    """Returns the 'No ... Hz līdz ... Hz' label of each band."""
+    return [f'No {start:.2f} Hz līdz {end:.2f} Hz' for start, end in ranges]
+
+def band_slices(frequency, ranges=frequency_ranges):
+    """Resolves each band to a slice of bins on a sorted frequency axis (ends inclusive)."""
+    frequency = np.asarray(frequency)
+    starts = np.searchsorted(frequency, [start for start, _ in ranges], side='left')
+    ends = np.searchsorted(frequency, [end for _, end in ranges], side='right')
+    return [slice(start, end) for start, end in zip(starts, ends)]
+
+def band_median_matrix(frequency, spectra, ranges=frequency_ranges):
+    """Computes the (spectra x bands) median table; bands without bins are NaN."""
+    spectra = np.atleast_2d(np.asarray(spectra, dtype=np.float64))
+    medians = np.full((spectra.shape[0], len(ranges)), np.nan)
+    for i, band in enumerate(band_slices(frequency, ranges)):
+        if band.stop > band.start:
+            medians[:, i] = np.median(spectra[:, band], axis=1)
+    return medians
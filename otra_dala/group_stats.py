@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+def time_group_keys(datetimes, by='day', shift_hours=8):
+    """Maps timestamps to group keys: 'day' (midnight), 'week' (Monday) or 'shift' (shift_hours blocks from midnight)."""
+    datetimes = np.asarray(datetimes, dtype='datetime64[s]')
+    if by == 'day':
+        return datetimes.astype('datetime64[D]')
+    if by == 'week':
+        days = datetimes.astype('datetime64[D]')
+        # 1970-01-01 bija ceturtdiena, tāpēc +3 dod dienas numuru no pirmdienas
+        return days - (days.astype(np.int64) + 3) % 7
+    if by == 'shift':
+        hours = datetimes.astype('datetime64[h]')
+        return hours - hours.astype(np.int64) % shift_hours
+    raise ValueError(f"Unknown grouping {by!r}, expected 'day', 'week' or 'shift'")
+
+def group_quantiles(keys, values, q):
+    """
+    Computes the q percentiles (0..100, linear interpolation as np.percentile) of values
+    for every distinct key in one pass over the sorted values. NaN values are ignored.
+    Returns (sorted unique keys, groups x len(q) array).
+    """
+    keys = np.asarray(keys)
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    keys, values = keys[valid], values[valid]
+
+    groups, inverse = np.unique(keys, return_inverse=True)
+    sorted_values = values[np.lexsort((values, inverse))]
+    counts = np.bincount(inverse, minlength=len(groups))
+    starts = np.cumsum(counts) - counts
+
+    quantiles = np.true_divide(np.asarray(q, dtype=np.float64), 100)
+    virtual = (counts[:, None] - 1) * quantiles[None, :]
+    below = np.floor(virtual).astype(np.int64)
+    above = np.minimum(below + 1, counts[:, None] - 1)
+    gamma = virtual - below
+
+    a = sorted_values[starts[:, None] + below]
+    b = sorted_values[starts[:, None] + above]
+    # Tāda pati interpolācija kā numpy (_lerp), lai rezultāts sakristu ar np.percentile
+    diff = b - a
+    result = np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+    return groups, result
+
+def percentile_range_table(datetimes, values, num_ranges=12, by='day'):
+    """
+    Splits each group's values into num_ranges percentile levels (the 0th percentile excluded)
+    and returns a tidy table with one row per group and level: Group, Range (1..num_ranges), Value.
+    """
+    keys = time_group_keys(datetimes, by)
+    levels = np.linspace(0, 100, num_ranges + 1)[1:]
+    groups, result = group_quantiles(keys, values, levels)
+    return pd.DataFrame({
+        'Group': np.repeat(groups, len(levels)),
+        'Range': np.tile(np.arange(1, len(levels) + 1), len(groups)),
+        'Value': result.ravel(),
+    })
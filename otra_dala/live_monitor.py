@@ -0,0 +1,282 @@
+import os
+import sys
+import time
+import queue
+import select
+import hashlib
+import struct
+import ctypes
+import ctypes.util
+import argparse
+import threading
+import numpy as np
+
+import csv_converter
+import spectrum_store
+import c2_scan
+import profiling
+from median_aggregator import MedianAggregator
+
+# inotify konstantes no <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+_event_header = struct.Struct('iIII')
+
+def inotify_available():
+    """Returns True if the C library exposes inotify (Linux)."""
+    libc_name = ctypes.util.find_library('c')
+    return bool(libc_name) and hasattr(ctypes.CDLL(libc_name), 'inotify_init1')
+
+def watch_inotify(folder, on_file, on_overflow, stop_event):
+    """Calls on_file(name) for every .bin file closed after writing (or moved) into folder."""
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    fd = libc.inotify_init1(os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    try:
+        if libc.inotify_add_watch(fd, os.fsencode(folder), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {folder}")
+
+        while not stop_event.is_set():
+            ready, _, _ = select.select([fd], [], [], 0.5)
+            if not ready:
+                continue
+            buffer = os.read(fd, 64 * 1024)
+            offset = 0
+            while offset < len(buffer):
+                _, mask, _, name_length = _event_header.unpack_from(buffer, offset)
+                offset += _event_header.size
+                name = buffer[offset:offset + name_length].rstrip(b'\0').decode(errors='replace')
+                offset += name_length
+                if mask & IN_Q_OVERFLOW:
+                    # Kodola notikumu rinda pārpildīta: daļa notikumu zaudēti, jāpārskata direktorija
+                    on_overflow()
+                elif name.endswith('.bin'):
+                    on_file(name)
+    finally:
+        os.close(fd)
+
+def watch_polling(folder, on_file, stop_event, interval=1.0):
+    """Calls on_file(name) once a .bin file's size and mtime stayed the same for one polling interval."""
+    previous = {}
+    reported = {}
+    while not stop_event.is_set():
+        current = {}
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.name.endswith('.bin') and entry.is_file():
+                    stat = entry.stat()
+                    current[entry.name] = (stat.st_size, stat.st_mtime_ns)
+
+        for name, state in sorted(current.items()):
+            # Fails tiek uzskatīts par pabeigtu, ja starp divām pārbaudēm nav mainījies
+            if previous.get(name) == state and reported.get(name) != state:
+                reported[name] = state
+                on_file(name)
+        previous = current
+        stop_event.wait(interval)
+
+class LiveMonitor:
+    """
+    Converts new recordings as they appear and keeps combined_c2_values.csv and the hourly medians current.
+    Uses the same float64 spectrum() as csv_converter by default, so live and backfilled C2 values agree.
+    A recording that fails is retried after retry_delay seconds, doubling the delay up to max_retries times.
+    """
+
+    def __init__(self, input_path, output_path, results_path, store_path=None, float32=False, queue_size=64,
+                 retry_delay=5.0, max_retries=5):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.results_path = results_path
+        self.store_path = store_path
+        self.float32 = float32
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+        self.failures = {}
+        os.makedirs(output_path, exist_ok=True)
+        os.makedirs(results_path, exist_ok=True)
+
+        # Ierobežota rinda: ja apstrāde atpaliek, novērotājs gaida (backpressure), nevis krāj atmiņā
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+        self.manifest = csv_converter.load_manifest(output_path)
+        self.combined_csv = os.path.join(results_path, "combined_c2_values.csv")
+        self.hourly_csv = os.path.join(results_path, "hourly_medians_c2_values.csv")
+        self.aggregator = MedianAggregator(os.path.join(results_path, "c2_state"), bucket='h')
+        if self.aggregator.is_empty() and os.path.exists(self.combined_csv):
+            # Bez stāvokļa mediānas tiktu pārrakstītas tikai ar jaunajiem ierakstiem: vispirms ielādē visu vēsturi
+            history = c2_scan.load_combined_c2_values(self.combined_csv)
+            self.aggregator.add(history)
+            self.aggregator.save_csv(self.hourly_csv)
+            print(f"Aggregator seeded with {len(history)} value(s) from {self.combined_csv}")
+
+    def is_converted(self, filename, stat):
+        record = self.manifest.get(filename)
+        return record is not None and record['size'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns
+
+    def enqueue(self, filename):
+        """Queues a file once; blocks while the queue is full."""
+        with self.lock:
+            if filename in self.pending:
+                return
+            self.pending.add(filename)
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put((filename, time.perf_counter()), timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def rescan(self):
+        """Queues every .bin file that the manifest does not cover yet (start-up and inotify overflow)."""
+        for filename in sorted(f for f in os.listdir(self.input_path) if f.endswith('.bin')):
+            stat = os.stat(os.path.join(self.input_path, filename))
+            if not self.is_converted(filename, stat):
+                self.enqueue(filename)
+
+    def handle(self, filename):
+        """Converts one recording and updates the C2 and hourly-median outputs."""
+        file_path = os.path.join(self.input_path, filename)
+        stat = os.stat(file_path)
+        if self.is_converted(filename, stat):
+            return False
+
+        # Kontrolsumma tiek aprēķināta no tiem pašiem baitiem, ko nolasa konvertēšana
+        hasher = hashlib.sha256()
+        frequencies, spectrum_data, csv_filepath = csv_converter.convert_bin_file(
+            self.input_path, self.output_path, filename, float32=self.float32, hasher=hasher)
+        if self.store_path is not None:
+            with profiling.stage('store_append', file=filename):
+                spectrum_store.append_spectrum(self.store_path, filename, frequencies, spectrum_data)
+
+        values = np.empty(1, dtype=c2_scan.c2_dtype)
+        values['timestamp'] = spectrum_store.parse_timestamp(filename)
+        values['c2_value'] = spectrum_data[np.argmin(np.abs(frequencies - spectrum_store.c2_frequency))]
+        if not np.isnat(values['timestamp'][0]):
+            with profiling.stage('combined_update', file=filename):
+                if self.aggregator.contains(values['timestamp'][0]):
+                    # Mainīts (atkārtoti konvertēts) ieraksts aizstāj savu rindu, tāpat kā agregatorā
+                    self.replace_combined_value(values)
+                else:
+                    # Jaunākie ieraksti tiek pievienoti faila beigās, nepārrakstot visu vēsturi
+                    new_file = not os.path.exists(self.combined_csv)
+                    with open(self.combined_csv, 'a', encoding='utf-8') as f:
+                        if new_file:
+                            f.write('Filename,C2 Value\n')
+                        f.write(f"{c2_scan.c2_filenames(values)[0]},{float(values['c2_value'][0])!r}\n")
+            with profiling.stage('aggregate', file=filename):
+                changed = self.aggregator.add(values)
+            with profiling.stage('save_hourly', file=filename):
+                self.aggregator.update_csv(self.hourly_csv, changed)
+
+        record = {
+            'file': filename,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': hasher.hexdigest(),
+            'output': os.path.basename(csv_filepath),
+            'outputs': csv_converter.requested_outputs(self.output_path, store_path=self.store_path),
+        }
+        with profiling.stage('manifest_append', file=filename):
+            csv_converter.append_manifest(self.output_path, record)
+        self.manifest[filename] = record
+        return True
+
+    def replace_combined_value(self, values):
+        """Rewrites combined_c2_values.csv with the stored row(s) for this timestamp replaced (rare: changed files only)."""
+        table = c2_scan.load_combined_c2_values(self.combined_csv) if os.path.exists(self.combined_csv) \
+            else np.empty(0, dtype=c2_scan.c2_dtype)
+        table = np.concatenate([table[table['timestamp'] != values['timestamp'][0]], values])
+        table = table[np.argsort(table['timestamp'], kind='stable')]
+        tmp_path = self.combined_csv + '.tmp'
+        c2_scan.save_combined_c2_values(table, tmp_path)
+        os.replace(tmp_path, self.combined_csv)
+
+    def retry_later(self, filename):
+        """Queues a failed recording again after an exponentially growing delay; False once max_retries is used up."""
+        attempts = self.failures.get(filename, 0) + 1
+        self.failures[filename] = attempts
+        if attempts > self.max_retries:
+            return False
+        timer = threading.Timer(self.retry_delay * 2 ** (attempts - 1), self.enqueue, args=(filename,))
+        timer.daemon = True
+        timer.start()
+        return True
+
+    def run(self, use_inotify=None, poll_interval=1.0):
+        """Watches input_path until interrupted, processing files in arrival order."""
+        if use_inotify is None:
+            use_inotify = inotify_available()
+        if use_inotify:
+            target, args = watch_inotify, (self.input_path, self.enqueue, self.rescan, self.stop_event)
+        else:
+            target, args = watch_polling, (self.input_path, self.enqueue, self.stop_event, poll_interval)
+        watcher = threading.Thread(target=target, args=args, daemon=True)
+        watcher.start()
+        print(f"Watching {self.input_path} ({'inotify' if use_inotify else 'polling'})")
+
+        # Ieraksti, kas parādījušies, kamēr monitors nedarbojās
+        threading.Thread(target=self.rescan, daemon=True).start()
+
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    filename, queued_at = self.queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                with self.lock:
+                    self.pending.discard(filename)
+                try:
+                    if self.handle(filename):
+                        print(f"Processed {filename} in {time.perf_counter() - queued_at:.2f} s "
+                              f"(queue: {self.queue.qsize()})")
+                    self.failures.pop(filename, None)
+                except Exception as e:
+                    # Fails var būt vēl nepabeigts vai īslaicīgi nepieejams: mēģina vēlreiz ar pieaugošu pauzi
+                    if self.retry_later(filename):
+                        print(f"Error processing {filename}: {e} (retry {self.failures[filename]} of {self.max_retries})")
+                    else:
+                        print(f"Error processing {filename}: {e} (giving up until the next rescan)")
+                        self.failures.pop(filename, None)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop_event.set()
+            watcher.join(timeout=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Converts new .bin recordings as they appear and updates the C2 aggregates.")
+    parser.add_argument("input_path", help="Recorder directory with .bin files")
+    parser.add_argument("--output", default=os.path.join(os.path.expanduser("~"), 'csv_output'),
+                        help="Spectrum CSV directory (as in csv_converter.py)")
+    parser.add_argument("--results", default="/home/arce/median_results",
+                        help="Directory for combined_c2_values.csv and hourly_medians_c2_values.csv")
+    parser.add_argument("--store", default=None, help="Also append spectra to this spectrum store")
+    parser.add_argument("--float32", action="store_true",
+                        help="Use the float32 SpectrumEngine (faster, but C2 values differ slightly from csv_converter)")
+    parser.add_argument("--poll", action="store_true", help="Poll the directory instead of using inotify")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--queue-size", type=int, default=64, help="Maximum number of queued recordings")
+    parser.add_argument("--retry-delay", type=float, default=5.0, help="Seconds before the first retry of a failed file")
+    parser.add_argument("--max-retries", type=int, default=5)
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_path):
+        print(f"Directory not found: {args.input_path}")
+        sys.exit(1)
+
+    # Kopsavilkums tiek izdrukāts pēc apturēšanas (Ctrl+C)
+    with profiling.session(args.profile):
+        with profiling.stage('seed_state'):
+            monitor = LiveMonitor(args.input_path, args.output, args.results, store_path=args.store,
+                                  float32=args.float32, queue_size=args.queue_size,
+                                  retry_delay=args.retry_delay, max_retries=args.max_retries)
+        monitor.run(use_inotify=False if args.poll else None, poll_interval=args.poll_interval)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+import spectrum_store
+import spectral_features
+import profiling
+from frequency_bands import frequency_ranges, band_median_matrix
+from wavelet_matrix import WaveletMatrix
+
+# Apkopes žurnāls: viena rinda katram notikumam (Datetime, Event, Notikums)
+events_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "events.csv")
+quartiles = (0.25, 0.5, 0.75)
+
+def load_events(path=events_file):
+    """Maintenance events sorted by time: Datetime, Event (English label) and Notikums (Latvian label)."""
+    events = pd.read_csv(path)
+    events['Datetime'] = pd.to_datetime(events['Datetime'], format='%Y-%m-%d %H:%M')
+    return events.sort_values('Datetime', ignore_index=True)
+
+def values_at(times, values, event_times):
+    """Value recorded exactly at each event time (NaN where there is none); times must be sorted."""
+    times = np.asarray(times, dtype='datetime64[ns]')
+    event_times = np.asarray(event_times, dtype='datetime64[ns]')
+    result = np.full(len(event_times), np.nan)
+    index = np.searchsorted(times, event_times)
+    found = index < len(times)
+    found[found] = times[index[found]] == event_times[found]
+    result[found] = np.asarray(values, dtype=np.float64)[index[found]]
+    return result
+
+def event_windows(times, event_times, before='24h', after='24h', skip='0h'):
+    """
+    Index ranges of the samples in each event's windows (times must be sorted):
+    before = [t - skip - before, t - skip), after = [t + skip, t + skip + after).
+    skip leaves out the samples right around the work itself. Returns (before_left, before_right, after_left, after_right).
+    """
+    times = np.asarray(times, dtype='datetime64[ns]')
+    event_times = np.asarray(event_times, dtype='datetime64[ns]')
+    before, after, skip = (pd.Timedelta(w).to_timedelta64() for w in (before, after, skip))
+    return (np.searchsorted(times, event_times - skip - before, side='left'),
+            np.searchsorted(times, event_times - skip, side='left'),
+            np.searchsorted(times, event_times + skip, side='left'),
+            np.searchsorted(times, event_times + skip + after, side='left'))
+
+def event_impact(times, metrics, events, before='24h', after='24h', skip='0h'):
+    """
+    Before/after statistics of every metric column around every event: sample count, median and IQR
+    in each window and the median shift (after - before). One rank structure per metric answers
+    all windows at once. Returns a tidy table with one row per event and metric.
+    """
+    times = np.asarray(times, dtype='datetime64[ns]')
+    order = np.argsort(times, kind='stable')
+    times = times[order]
+    event_times = events['Datetime'].values
+
+    tables = []
+    for metric in metrics.columns:
+        values = np.asarray(metrics[metric], dtype=np.float64)[order]
+        valid = ~np.isnan(values)
+        b_left, b_right, a_left, a_right = event_windows(times[valid], event_times, before, after, skip)
+        matrix = WaveletMatrix(values[valid]) if valid.any() else None
+        stats = {}
+        for side, left, right in (('before', b_left, b_right), ('after', a_left, a_right)):
+            q = matrix.range_quantiles(left, right, quartiles) if matrix is not None \
+                else np.full((len(left), len(quartiles)), np.nan)
+            stats[f'n_{side}'] = right - left
+            stats[f'median_{side}'] = q[:, 1]
+            stats[f'iqr_{side}'] = q[:, 2] - q[:, 0]
+        table = pd.DataFrame({'Datetime': events['Datetime'].values, 'Event': events['Event'].values, 'Metric': metric})
+        table = table.assign(**stats)
+        table['shift'] = table['median_after'] - table['median_before']
+        tables.append(table)
+
+    return pd.concat(tables, ignore_index=True)
+
+def load_metrics(path):
+    """
+    C2 value and the 12 band medians of every recording, from a spectral_features directory,
+    a spectrum store or a folder of converter CSVs. Returns (timestamps, metrics DataFrame).
+    """
+    if spectral_features.read_schema(path) is not None:
+        features = spectral_features.features_frame(path)
+        columns = [c for c in features.columns if c.startswith(('power_', 'band_')) and c != 'band_power_db']
+        metrics = features[columns].rename(columns={f'power_{spectrum_store.c2_frequency:g}_hz': 'C2 Value'})
+        return features['timestamp'].values, metrics
+
+    names, frequencies, spectra = spectrum_store.load_spectra(path)
+    spectra = np.asarray(spectra, dtype=np.float64)
+    metrics = pd.DataFrame(band_median_matrix(frequencies, spectra),
+                           columns=[f'band_{i + 1}_median' for i in range(len(frequency_ranges))])
+    metrics.insert(0, 'C2 Value', spectra[:, np.argmin(np.abs(frequencies - spectrum_store.c2_frequency))])
+    return np.array([spectrum_store.parse_timestamp(name) for name in names]), metrics
+
+def main():
+    parser = argparse.ArgumentParser(description="Before/after statistics of the C2 value and band medians around maintenance events.")
+    parser.add_argument("input_path", help="spectral_features directory, spectrum store or csv_converter CSV directory")
+    parser.add_argument("--events", default=events_file, help="Event log CSV (Datetime, Event, Notikums)")
+    parser.add_argument("--before", default='24h', help="Window before each event (pandas Timedelta)")
+    parser.add_argument("--after", default='24h', help="Window after each event")
+    parser.add_argument("--skip", default='0h', help="Time left out on both sides of each event")
+    parser.add_argument("--output", default="event_impact.csv")
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+
+    with profiling.session(args.profile):
+        with profiling.stage('load_metrics'):
+            times, metrics = load_metrics(args.input_path)
+        with profiling.stage('event_impact', recordings=len(times)):
+            table = event_impact(times, metrics, load_events(args.events), args.before, args.after, args.skip)
+        with profiling.stage('write_csv'):
+            table.to_csv(args.output, index=False)
+    print(f"{table['Datetime'].nunique()} events x {len(metrics.columns)} metrics, saved to {args.output}")
+    print(table[table['Metric'] == 'C2 Value'].to_string(index=False))
+
+if __name__ == "__main__":
+    main()
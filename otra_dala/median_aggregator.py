@@ -0,0 +1,280 @@
+import os
+import json
+import argparse
+import numpy as np
+import c2_scan
+import spectrum_store
+import profiling
+
+# Atbalstītie intervālu platumi sekundēs (tādi paši nosaukumi kā pandas resample)
+bucket_widths = {'15min': 15 * 60, 'h': 60 * 60, 'D': 24 * 60 * 60}
+
+# Stāvokļa direktorija: meta.json, medians.bin (sākuma laiks + viena mediāna katram intervālam) un buckets/<sākums>.bin
+meta_file = "meta.json"
+medians_file = "medians.bin"
+buckets_dir = "buckets"
+state_version = 2
+_origin = np.dtype('<i8')
+_slot = np.dtype('<f8')
+
+def _write_atomic(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _format_row(start, value):
+    return f"{str(start).replace('T', ' ')},{float(value)!r}\n"
+
+def _csv_offset(path, key):
+    """
+    Byte offset of the first row of a time-sorted medians CSV whose Datetime is >= key, found by reading
+    the file backwards from its end (so the cost depends on the rows after key, not on the file length).
+    None if the file has no header or does not end with a complete row.
+    """
+    key = key.encode()
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return None
+        f.seek(end - 1)
+        if f.read(1) != b'\n':
+            return None
+        tail = b''
+        while True:
+            start = max(0, end - (1 << 16))
+            f.seek(start)
+            tail = f.read(end - start) + tail
+            end = start
+            lines = tail.split(b'\n')
+            # Pirmā rinda var būt nepilnīga, ja fails nav nolasīts līdz sākumam
+            first = 0 if start == 0 else 1
+            position = start + sum(len(line) + 1 for line in lines[:first])
+            positions = []
+            for line in lines[first:]:
+                positions.append(position)
+                position += len(line) + 1
+            for line, position in zip(reversed(lines[first:]), reversed(positions)):
+                if not line:
+                    continue
+                if line.startswith(b'Datetime') or line[:len(key)] < key:
+                    return position + len(line) + 1
+            if start == 0:
+                return None
+
+class MedianAggregator:
+    """
+    Keeps every C2 value in per-bucket files sorted by value, plus a table of the current bucket medians.
+    Adding a recording reads and rewrites only its own bucket and one fixed-offset slot of medians.bin,
+    so the cost does not grow with the history. A value for a timestamp that is already stored replaces
+    it (a re-converted recording).
+    """
+
+    def __init__(self, state_path, bucket='h'):
+        if bucket not in bucket_widths:
+            raise ValueError(f"Unknown bucket width {bucket!r}, expected one of {list(bucket_widths)}")
+        self.state_path = state_path
+        self.bucket = bucket
+        self.width = np.timedelta64(bucket_widths[bucket], 's')
+        os.makedirs(os.path.join(state_path, buckets_dir), exist_ok=True)
+
+        meta_path = os.path.join(state_path, meta_file)
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta['bucket'] != bucket:
+                raise ValueError(f"{state_path} holds {meta['bucket']!r} buckets, not {bucket!r}")
+
+        # medians.bin: int64 pirmā intervāla sākums (s), tad float64 mediāna katram intervālam (NaN - nav datu)
+        self.medians_path = os.path.join(state_path, medians_file)
+        self.origin = None
+        self.values = np.empty(0, dtype=_slot)
+        if meta.get('version') != state_version:
+            # Iepriekšējā formāta (vai jauns) stāvoklis: mediānas tiek pārrēķinātas no intervālu failiem
+            self._rebuild_medians()
+            _write_atomic(meta_path, json.dumps({'bucket': bucket, 'version': state_version}).encode())
+        elif os.path.exists(self.medians_path) and os.path.getsize(self.medians_path) >= _origin.itemsize:
+            with open(self.medians_path, 'rb') as f:
+                self.origin = np.datetime64(int(np.frombuffer(f.read(_origin.itemsize), dtype=_origin)[0]), 's')
+                data = f.read()
+            self.values = np.frombuffer(data[:len(data) // _slot.itemsize * _slot.itemsize], dtype=_slot).copy()
+
+    def _rebuild_medians(self):
+        starts = sorted(np.datetime64(int(name[:-4]), 's')
+                        for name in os.listdir(os.path.join(self.state_path, buckets_dir)) if name.endswith('.bin'))
+        self.origin, self.values = None, np.empty(0, dtype=_slot)
+        for start in starts:
+            self._set_slot(start, self._median(self._read_bucket(start)))
+        self._write_medians()
+
+    def _write_medians(self):
+        if self.origin is None:
+            _write_atomic(self.medians_path, b'')
+            return
+        header = np.array([self.origin.astype(np.int64)], dtype=_origin)
+        _write_atomic(self.medians_path, header.tobytes() + self.values.astype(_slot).tobytes())
+
+    def _set_slot(self, start, value):
+        """Stores a bucket median in memory; returns the slot number, or None if the origin moved (full rewrite)."""
+        if self.origin is None:
+            self.origin = start
+        slot = int((start - self.origin) // self.width)
+        moved = slot < 0
+        if moved:
+            self.values = np.concatenate([np.full(-slot, np.nan), self.values])
+            self.origin, slot = start, 0
+        elif slot >= len(self.values):
+            self.values = np.concatenate([self.values, np.full(slot + 1 - len(self.values), np.nan)])
+        self.values[slot] = value
+        return None if moved else slot
+
+    @staticmethod
+    def _median(records):
+        # Kārtots pēc vērtības; NaN beigās un mediānā netiek skaitīts (kā pandas median)
+        valid = records['c2_value'][:np.count_nonzero(~np.isnan(records['c2_value']))]
+        if len(valid) == 0:
+            return np.nan
+        middle = len(valid) // 2
+        return valid[middle] if len(valid) % 2 else (valid[middle - 1] + valid[middle]) / 2
+
+    def is_empty(self):
+        """True if no bucket has been written yet."""
+        return not os.listdir(os.path.join(self.state_path, buckets_dir))
+
+    def bucket_start(self, timestamps):
+        timestamps = np.asarray(timestamps, dtype='<M8[s]')
+        return timestamps - (timestamps - np.datetime64(0, 's')) % self.width
+
+    def _bucket_path(self, start):
+        return os.path.join(self.state_path, buckets_dir, f"{int(start.astype(np.int64))}.bin")
+
+    def _read_bucket(self, start):
+        path = self._bucket_path(start)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=c2_scan.c2_dtype)
+        return np.fromfile(path, dtype=c2_scan.c2_dtype)
+
+    def contains(self, timestamp):
+        """True if a value for this timestamp is already stored (reads only its bucket)."""
+        timestamp = np.datetime64(timestamp, 's')
+        return bool(np.any(self._read_bucket(self.bucket_start(timestamp))['timestamp'] == timestamp))
+
+    def add(self, values):
+        """Stores (timestamp, c2_value) records (latest wins per timestamp) and returns the bucket starts that changed."""
+        values = np.asarray(values, dtype=c2_scan.c2_dtype)
+        values = values[~np.isnat(values['timestamp'])]
+        if len(values) == 0:
+            return set()
+
+        previous_slots = len(self.values)
+        starts = self.bucket_start(values['timestamp'])
+        changed, slots, moved = set(), [], False
+        for start in np.unique(starts):
+            new = values[starts == start]
+            # Vairākas vērtības ar vienu laiku: paliek pēdējā
+            _, last = np.unique(new['timestamp'][::-1], return_index=True)
+            new = new[len(new) - 1 - last]
+
+            stored = self._read_bucket(start)
+            stored = stored[~np.isin(stored['timestamp'], new['timestamp'])]
+            merged = np.concatenate([stored, new])
+            merged = merged[np.argsort(merged['c2_value'], kind='stable')]
+            _write_atomic(self._bucket_path(start), merged.tobytes())
+
+            slot = self._set_slot(start, self._median(merged))
+            moved = moved or slot is None
+            slots.append(slot)
+            changed.add(start)
+
+        if moved or previous_slots == 0:
+            self._write_medians()
+        else:
+            # Katra intervāla mediāna ir fiksētā vietā: tiek pārrakstītas tikai mainītās vietas un jaunās beigās
+            with open(self.medians_path, 'r+b') as f:
+                for slot in sorted(slot for slot in slots if slot < previous_slots):
+                    f.seek(_origin.itemsize + slot * _slot.itemsize)
+                    f.write(self.values[slot:slot + 1].tobytes())
+                if len(self.values) > previous_slots:
+                    f.seek(_origin.itemsize + previous_slots * _slot.itemsize)
+                    f.write(self.values[previous_slots:].tobytes())
+        return changed
+
+    def median_table(self, since=None):
+        """Returns the time-sorted c2_dtype array of bucket medians (only buckets starting at or after since, if given)."""
+        if self.origin is None:
+            return np.empty(0, dtype=c2_scan.c2_dtype)
+        first = 0 if since is None else max(int((np.datetime64(since, 's') - self.origin) // self.width), 0)
+        slots = first + np.flatnonzero(~np.isnan(self.values[first:]))
+        table = np.empty(len(slots), dtype=c2_scan.c2_dtype)
+        table['timestamp'] = self.origin + slots * self.width
+        table['c2_value'] = self.values[slots]
+        return table
+
+    def save_csv(self, csv_path):
+        """Writes the medians in the hourly_medians_c2_values.csv format (Datetime, C2 Value)."""
+        table = self.median_table()
+        tmp_path = csv_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('Datetime,C2 Value\n')
+            f.writelines(_format_row(start, value) for start, value in zip(table['timestamp'], table['c2_value']))
+        os.replace(tmp_path, csv_path)
+        return csv_path
+
+    def update_csv(self, csv_path, changed):
+        """
+        Brings a CSV written by save_csv up to date after add() returned changed: only the rows from the
+        earliest changed bucket on are rewritten (usually just the last one). Falls back to save_csv if the
+        file is missing or was left incomplete; the CSV is derived from the state and can always be rebuilt.
+        """
+        if not changed:
+            return csv_path
+        earliest = min(changed)
+        offset = _csv_offset(csv_path, str(earliest).replace('T', ' ')) if os.path.exists(csv_path) else None
+        if offset is None:
+            return self.save_csv(csv_path)
+
+        table = self.median_table(since=earliest)
+        rows = ''.join(_format_row(start, value) for start, value in zip(table['timestamp'], table['c2_value']))
+        data = rows.encode('utf-8')
+        # Jaunās rindas tiek ierakstītas virs vecajām un tikai pēc tam fails tiek saīsināts
+        with open(csv_path, 'r+b') as f:
+            f.seek(offset)
+            f.write(data)
+            f.truncate(offset + len(data))
+        return csv_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Adds new spectrum CSV files to the C2 median aggregator and rewrites the medians CSV.")
+    parser.add_argument("csv_files", nargs='+', help="New spectrum CSV files from csv_converter.py")
+    parser.add_argument("--state", default="/home/arce/median_results/c2_state", help="Aggregator state directory")
+    parser.add_argument("--output", default="/home/arce/median_results/hourly_medians_c2_values.csv")
+    parser.add_argument("--bucket", choices=list(bucket_widths), default='h')
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+
+    with profiling.session(args.profile):
+        timestamps, c2_values = [], []
+        with profiling.stage('read_c2_values', files=len(args.csv_files)):
+            for file_path in args.csv_files:
+                value = c2_scan.read_c2_value(file_path)
+                if value is None:
+                    print(f"No 'Value' column found in {file_path}")
+                    continue
+                timestamps.append(spectrum_store.parse_timestamp(os.path.basename(file_path)))
+                c2_values.append(value)
+
+        values = np.empty(len(c2_values), dtype=c2_scan.c2_dtype)
+        values['timestamp'] = timestamps
+        values['c2_value'] = c2_values
+
+        with profiling.stage('load_state'):
+            aggregator = MedianAggregator(args.state, bucket=args.bucket)
+        with profiling.stage('aggregate', values=len(values)):
+            changed = aggregator.add(values)
+        with profiling.stage('update_csv'):
+            aggregator.update_csv(args.output, changed)
+    print(f"Updated {len(changed)} bucket(s), medians saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import inspect
+import hashlib
+import threading
+import contextlib
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import profiling
+
+# Stāvoklis: katra posma ievades atslēga un izvades failu saturs pēc pēdējās veiksmīgās izpildes
+state_file = ".pipeline_state.json"
+
+class Stage:
+    """
+    One step of a pipeline: func(*args) reads the inputs (files or folders) and writes the outputs (files).
+    Stages that use the same lock name (e.g. 'pyplot') never run at the same time.
+    """
+
+    def __init__(self, name, func, args=(), inputs=(), outputs=(), lock=None, version=None):
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.inputs = [os.path.abspath(path) for path in inputs]
+        self.outputs = [os.path.abspath(path) for path in outputs]
+        self.lock = lock
+        self.version = version
+
+    def code_digest(self):
+        return source_digest(self.func, self.version)
+
+def source_digest(func, version=None):
+    """
+    Hash of the source files of func's module and of every module from the same folder it imports
+    (directly or through other such modules), plus the optional version string, so that an edited
+    helper also makes the outputs stale.
+    """
+    digest = hashlib.sha256(repr(version).encode())
+    paths = local_module_paths(inspect.getmodule(func))
+    if not paths:
+        digest.update(getattr(func, '__qualname__', repr(func)).encode())
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f'{os.path.basename(path)}\0'.encode() + f.read())
+    return digest.hexdigest()
+
+def _module_path(module):
+    path = getattr(module, '__file__', None)
+    return os.path.abspath(path) if path and path.endswith('.py') else None
+
+def local_module_paths(module):
+    """Sorted source paths of module and of the modules from its folder it reaches through its globals."""
+    root = _module_path(module)
+    if root is None:
+        return []
+    folder = os.path.dirname(root)
+    seen = {root: module}
+    queue = [module]
+    while queue:
+        for value in vars(queue.pop()).values():
+            # Gan `import plotting`, gan `from plotting import ...` (funkcijas/klases modulis)
+            other = value if inspect.ismodule(value) else inspect.getmodule(value) \
+                if inspect.isfunction(value) or inspect.isclass(value) else None
+            path = _module_path(other)
+            if path is not None and path not in seen and os.path.dirname(path) == folder:
+                seen[path] = other
+                queue.append(other)
+    return sorted(seen)
+
+class Pipeline:
+    """
+    Runs stages in dependency order (a stage depends on the stages that write its inputs), independent
+    stages concurrently. A stage is skipped when the hash of its code, arguments and input contents matches
+    the last successful run and its outputs are unchanged; since the key is built from the inputs' content,
+    a stage whose upstream was rerun but produced identical files is skipped as well.
+    """
+
+    def __init__(self, stages, state_path, workers=2):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = state_path
+        self.workers = workers
+        producers = {path: stage.name for stage in stages for path in stage.outputs}
+        self.dependencies = {stage.name: {producers[path] for path in stage.inputs if path in producers}
+                             for stage in stages}
+        self.locks = {stage.lock: threading.Lock() for stage in stages if stage.lock is not None}
+        self.digests = {}
+        self.digest_lock = threading.Lock()
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {'stages': {}, 'files': {}}
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def path_digest(self, path):
+        """
+        Content hash of a file, or of a folder's listing (names, sizes, mtimes). A file is only re-read
+        when its size or mtime differs from the last time it was hashed. None if the path does not exist.
+        """
+        if os.path.isdir(path):
+            digest = hashlib.sha256()
+            with os.scandir(path) as entries:
+                for entry in sorted((e for e in entries if e.is_file()), key=lambda e: e.name):
+                    stat = entry.stat()
+                    digest.update(f'{entry.name}\0{stat.st_size}\0{stat.st_mtime_ns}\n'.encode())
+            return digest.hexdigest()
+        if not os.path.exists(path):
+            return None
+
+        stat = os.stat(path)
+        with self.digest_lock:
+            known = self.digests.get(path)
+        if known is not None and known[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return known[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        with self.digest_lock:
+            self.digests[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def stage_key(self, stage):
+        key = hashlib.sha256()
+        key.update(stage.code_digest().encode())
+        key.update(repr(stage.args).encode())
+        for path in stage.inputs:
+            key.update(f'{path}\0{self.path_digest(path)}\n'.encode())
+        return key.hexdigest()
+
+    def _run_stage(self, stage, previous, force):
+        key = self.stage_key(stage)
+        if not force and previous is not None and previous['key'] == key and \
+                all(self.path_digest(path) == digest for path, digest in previous['outputs'].items()):
+            return 'up to date', 0.0, previous
+
+        lock = self.locks.get(stage.lock)
+        start = time.perf_counter()
+        with profiling.stage(stage.name):
+            if lock is not None:
+                with lock:
+                    stage.func(*stage.args)
+            else:
+                stage.func(*stage.args)
+        outputs = {path: self.path_digest(path) for path in stage.outputs}
+        return 'ran', time.perf_counter() - start, {'key': key, 'outputs': outputs}
+
+    def _submit(self, pool, stage, previous, force):
+        if pool is not None:
+            return pool.submit(self._run_stage, stage, previous, force)
+        future = Future()
+        try:
+            future.set_result(self._run_stage(stage, previous, force))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def run(self, force=False):
+        """Runs every stage that is not up to date; returns {stage name: 'ran' | 'up to date' | 'failed' | 'blocked'}."""
+        state = self._load_state()
+        self.digests = state.get('files', {})
+        status = {}
+        pending = set(self.stages)
+
+        # Ar vienu darbinieku posmi tiek izpildīti galvenajā pavedienā (piem. interaktīviem pyplot logiem)
+        executor = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else contextlib.nullcontext()
+        with executor as pool:
+            running = {}
+            while pending or running:
+                # Posms ir gatavs, kad visi tā priekšteči ir pabeigti; neveiksmīga priekšteča pēcteči tiek bloķēti
+                for name in sorted(pending):
+                    dependencies = self.dependencies[name]
+                    if any(status.get(d) in ('failed', 'blocked') for d in dependencies):
+                        status[name] = 'blocked'
+                        print(f"{name:<32} blocked (an input stage failed)")
+                        pending.discard(name)
+                    elif all(d in status for d in dependencies):
+                        future = self._submit(pool, self.stages[name], state['stages'].get(name), force)
+                        running[future] = name
+                        pending.discard(name)
+                if not running:
+                    if pending:
+                        raise ValueError(f"Stages depend on each other in a cycle: {sorted(pending)}")
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        result, seconds, entry = future.result()
+                    except Exception as e:
+                        status[name] = 'failed'
+                        state['stages'].pop(name, None)
+                        print(f"{name:<32} FAILED: {type(e).__name__}: {e}")
+                    else:
+                        status[name] = result
+                        state['stages'][name] = entry
+                        print(f"{name:<32} {result}" + (f" in {seconds:.2f} s" if result == 'ran' else ""))
+                    with self.digest_lock:
+                        state['files'] = dict(self.digests)
+                    self._save_state(state)
+
+        return status
@@ -0,0 +1,134 @@
+import os
+import hashlib
+import profiling
+import pipeline
+import numpy as np
+import pandas as pd
+import matplotlib
+import matplotlib.pyplot as plt
+
+def _as_float(x):
+    """Converts numeric or datetime-like values to float64 for bucketing."""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+def minmax_indices(x, y, n_buckets):
+    """Indices of the minimum and maximum y in each of n_buckets equal-width x buckets (sorted, unique)."""
+    xf, yf = _as_float(x), _as_float(y)
+    if len(xf) <= 2 * n_buckets:
+        return np.arange(len(xf))
+
+    valid = ~np.isnan(yf)
+    if not valid.any():
+        # Nav ko zīmēt; paliek tikai galapunkti, lai ass diapazons nemainās
+        return np.array([0, len(xf) - 1])
+    span = xf.max() - xf.min()
+    buckets = np.zeros(len(xf), dtype=np.int64) if span == 0 else \
+        np.minimum(((xf - xf.min()) / span * n_buckets).astype(np.int64), n_buckets - 1)
+
+    # Sakārto pēc (spainis, y); pirmais un pēdējais elements katrā spainī ir minimums un maksimums
+    order = np.lexsort((yf[valid], buckets[valid]))
+    positions = np.flatnonzero(valid)[order]
+    bucket_sorted = buckets[positions]
+    first = np.r_[True, bucket_sorted[1:] != bucket_sorted[:-1]]
+    last = np.r_[bucket_sorted[1:] != bucket_sorted[:-1], True]
+    keep = np.concatenate([positions[first], positions[last], [0, len(xf) - 1]])
+    return np.unique(keep)
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out points that keep the visual shape of the series."""
+    xf, yf = _as_float(x), _as_float(y)
+    n = len(xf)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    # Trijstūra pirmā virsotne ir pēdējais izvēlētais punkts ar vērtību (NaN punkts nevar būt virsotne)
+    valid = ~np.isnan(yf)
+    anchor = 0 if valid[0] else (int(np.argmax(valid)) if valid.any() else 0)
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        # Nākamā spaiņa vidējais punkts (bez NaN) ir trijstūra trešā virsotne
+        next_valid = valid[end:next_end] if next_end > end else valid[-1:]
+        next_x = xf[end:next_end] if next_end > end else xf[-1:]
+        next_y = yf[end:next_end] if next_end > end else yf[-1:]
+        if next_valid.any():
+            avg_x, avg_y = next_x[next_valid].mean(), next_y[next_valid].mean()
+        else:
+            avg_x, avg_y = next_x.mean(), yf[anchor]
+        area = np.abs((xf[anchor] - avg_x) * (yf[start:end] - yf[anchor])
+                      - (xf[anchor] - xf[start:end]) * (avg_y - yf[anchor]))
+        if np.any(~np.isnan(area)):
+            selected = start + int(np.nanargmax(area))
+            anchor = selected
+        else:
+            selected = start
+        indices[i + 1] = selected
+    return indices
+
+def downsample(df, x_column, y_column, max_points, method='minmax'):
+    """Returns the rows of df to draw: all of them if there are few, else a min/max-per-bucket or LTTB subset."""
+    if max_points is None or len(df) <= max_points:
+        return df
+    x, y = df[x_column].values, df[y_column].values
+    if method == 'minmax':
+        indices = minmax_indices(x, y, max(max_points // 2, 1))
+    elif method == 'lttb':
+        indices = lttb_indices(x, y, max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method {method!r}, expected 'minmax' or 'lttb'")
+    return df.iloc[indices]
+
+def pixel_width(fig_width_in, dpi):
+    """Number of horizontal pixels in a saved figure; more points than this cannot be told apart."""
+    return int(fig_width_in * dpi)
+
+def content_hash(*parts):
+    """SHA-256 of the given DataFrames, arrays and plain values."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            digest.update(repr(list(part.columns) if isinstance(part, pd.DataFrame) else part.name).encode())
+            digest.update(pd.util.hash_pandas_object(part, index=False).values.tobytes())
+        elif isinstance(part, np.ndarray):
+            digest.update(str(part.dtype).encode())
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def render_cached(output_file, inputs, render, version=None):
+    """
+    Calls render() only if output_file is missing or was rendered from different inputs or code.
+    The key covers the inputs, the source of render's module and the local modules it uses
+    (as pipeline.Stage does) and an optional version string; it is kept in output_file + '.sha256'.
+    Returns True if rendered.
+    """
+    key = content_hash(*inputs, pipeline.source_digest(render, version))
+    hash_file = output_file + '.sha256'
+    if os.path.exists(output_file) and os.path.exists(hash_file):
+        with open(hash_file, 'r') as f:
+            if f.read().strip() == key:
+                print(f"Plot up to date, skipped: {output_file}")
+                return False
+
+    with profiling.stage('render', file=os.path.basename(output_file)):
+        render()
+    with open(hash_file, 'w') as f:
+        f.write(key)
+    return True
+
+def finish_figure(fig=None):
+    """Shows the figure on an interactive backend and closes it; on Agg (batch runs) it is only closed."""
+    if matplotlib.get_backend().lower() != 'agg':
+        plt.show()
+    if fig is not None:
+        plt.close(fig)
+    else:
+        plt.close()
@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextlib
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Profilēšana ir izslēgta, līdz tiek izsaukts enable() (piem. ar --profile); tad katrs posms ir viena JSON rinda
+default_output = "profile.jsonl"
+_state = {'path': None, 'fd': None, 'pid': None, 'run': None, 'start': None}
+_local = threading.local()
+
+def add_argument(parser):
+    """Adds the shared --profile [FILE] option to an entry point's argument parser."""
+    parser.add_argument("--profile", nargs='?', const=default_output, default=None, metavar="FILE",
+                        help=f"Writes per-stage timing, peak RSS and I/O records as JSON lines ({default_output} by default) "
+                             "and prints a summary at the end; I/O and RSS are per process, CPU time per thread")
+
+def enabled():
+    return _state['path'] is not None
+
+def peak_rss():
+    """Peak resident set size of this process in bytes (None where unavailable)."""
+    if resource is None:
+        return None
+    # Linux ru_maxrss ir kilobaitos
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def io_counters():
+    """Bytes this process (all its threads) has passed to read/write calls so far (None where /proc is unavailable)."""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            fields = dict(line.split(':') for line in f)
+    except OSError:
+        return None
+    # rchar/wchar ietver arī lapu kešatmiņā atrastos datus; memmap lasīšana šeit netiek skaitīta
+    return int(fields['rchar']), int(fields['wchar'])
+
+def enable(path=default_output, run=None):
+    """Starts writing records to path (appended); worker processes pass the parent's run id."""
+    _state.update(path=path, fd=None, pid=None, run=run or uuid.uuid4().hex[:12], start=time.perf_counter())
+
+def disable():
+    if _state['fd'] is not None and _state['pid'] == os.getpid():
+        os.close(_state['fd'])
+    _state.update(path=None, fd=None, pid=None, run=None, start=None)
+
+def worker_args():
+    """initargs for init_worker, so that a process pool profiles into the same file and run."""
+    return _state['path'], _state['run']
+
+def init_worker(path, run):
+    if path is not None:
+        enable(path, run)
+
+def record(kind, **fields):
+    """Appends one JSON record; every record is a single write to an O_APPEND file, so processes can share it."""
+    if not enabled():
+        return
+    if _state['pid'] != os.getpid():
+        # Pēc fork bērnprocess atver failu pats
+        _state['fd'] = os.open(_state['path'], os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        _state['pid'] = os.getpid()
+    line = json.dumps({'kind': kind, 'run': _state['run'], 'pid': os.getpid(), 'time': time.time(), **fields})
+    os.write(_state['fd'], (line + '\n').encode('utf-8'))
+
+@contextlib.contextmanager
+def stage(name, **fields):
+    """
+    Times the enclosed block and records its wall seconds, the CPU seconds of the calling thread, the bytes
+    the whole process read/written meanwhile and the process peak RSS after it. Extra fields (e.g. file=...)
+    are stored with the record. No-op when disabled.
+
+    The I/O counters cover every thread of the process, so stages that overlap in threads (pipeline with
+    workers > 1) each count the others' I/O too; run with one worker, or with process pools, for exact figures.
+    """
+    if not enabled():
+        yield
+        return
+
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    parent = stack[-1] if stack else None
+    stack.append(name)
+    io_start = io_counters()
+    cpu_start = time.thread_time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        cpu_seconds = time.thread_time() - cpu_start
+        io_end = io_counters()
+        stack.pop()
+        read_bytes, write_bytes = ((io_end[0] - io_start[0], io_end[1] - io_start[1])
+                                   if io_start is not None and io_end is not None else (None, None))
+        # I/O un RSS ir visa procesa skaitītāji, CPU laiks tikai šim pavedienam
+        record('stage', stage=name, parent=parent, seconds=seconds, thread_cpu_seconds=cpu_seconds,
+               process_read_bytes=read_bytes, process_write_bytes=write_bytes, process_peak_rss_bytes=peak_rss(),
+               error=error, **fields)
+
+def summary(path, run=None):
+    """
+    Per-stage totals of a run (the last one in path by default), slowest stage first.
+    The process_* columns are process-wide counters sampled around each stage (see stage()).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    stages = pd.DataFrame([r for r in records if r['kind'] == 'stage'])
+    if stages.empty:
+        return stages
+    run = run or stages['run'].iloc[-1]
+    stages = stages[stages['run'] == run]
+    table = stages.groupby('stage').agg(
+        calls=('seconds', 'size'),
+        total_s=('seconds', 'sum'),
+        mean_s=('seconds', 'mean'),
+        max_s=('seconds', 'max'),
+        thread_cpu_s=('thread_cpu_seconds', 'sum'),
+        process_read_mib=('process_read_bytes', lambda b: b.sum() / 2**20),
+        process_write_mib=('process_write_bytes', lambda b: b.sum() / 2**20),
+        process_peak_rss_mib=('process_peak_rss_bytes', lambda b: b.max() / 2**20),
+        processes=('pid', 'nunique'),
+        errors=('error', 'count'),
+    )
+    return table.sort_values('total_s', ascending=False)
+
+def finish():
+    """Records the end of the run, prints the stage summary and switches profiling off."""
+    if not enabled():
+        return None
+    path, run = _state['path'], _state['run']
+    seconds, rss = time.perf_counter() - _state['start'], peak_rss()
+    record('run', seconds=seconds, peak_rss_bytes=rss)
+    disable()
+
+    table = summary(path, run)
+    rss_text = f", peak RSS {rss / 2**20:.1f} MiB (main process)" if rss is not None else ""
+    print(f"Profile {run}: {seconds:.2f} s wall{rss_text}, saved to {path}")
+    if not table.empty:
+        print(table.to_string(float_format=lambda x: f"{x:.3f}"))
+    return table
+
+@contextlib.contextmanager
+def session(path):
+    """enable(path) ... finish() around an entry point's work; does nothing if path is None."""
+    if path is None:
+        yield
+        return
+    enable(path)
+    try:
+        yield
+    finally:
+        finish()
@@ -3,8 +3,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 import os
 import glob
+import argparse
 from datetime import datetime
 from matplotlib.colors import LinearSegmentedColormap
+import plotting
+import profiling
 
 def compute_median_ranges(data, num_ranges=12):
     """Computes median values of the data split into specified number of ranges."""
@@ -24,68 +27,97 @@ def extract_date(filename):
 
 # Folder containing the CSV files
 folder_path = "/home/arce/results/anomaly_medians/"
-file_paths = glob.glob(os.path.join(folder_path, "*.csv"))
+plot_save_path = "/home/arce/results/median_motor_noise_across_files.png"
 
-all_medians = []
-file_dates = []
+def load_median_ranges(folder_path):
+    """Reads every *_anomaly.csv in folder_path into a date-sorted DataFrame of 12 range medians (None if empty)."""
+    file_paths = glob.glob(os.path.join(folder_path, "*.csv"))
 
-for file_path in file_paths:
-    file_base_name = os.path.splitext(os.path.basename(file_path))[0]
-    
-    try:
-        df = pd.read_csv(file_path)
-        
-        if 'Range' not in df.columns or 'Median Motor Noise (dB)' not in df.columns:
-            print(f"Skipping file {file_base_name}: Expected 'Range' or 'Median Motor Noise (dB)' column not found")
-            continue
-        
-        median_values = df['Median Motor Noise (dB)'].values
-        medians = compute_median_ranges(median_values, num_ranges=12)
-        
-        date = extract_date(file_base_name)
-        if date is not None:
-            all_medians.append(medians)
-            file_dates.append(date)
-        else:
-            print(f"Skipping file {file_base_name}: Unable to extract date")
-    except Exception as e:
-        print(f"Error processing file {file_base_name}: {e}")
-
-if not file_dates:
-    print("No valid data to plot. Please check your file names and data.")
-    exit()
-
-# Sort data by date
-sorted_data = sorted(zip(file_dates, all_medians))
-file_dates, all_medians = zip(*sorted_data)
-
-# Convert to DataFrame for plotting
-medians_df = pd.DataFrame(all_medians, index=file_dates, columns=[f'Range_{i+1}' for i in range(12)])
-
-# Create a custom colormap with more saturated colors
-colors = plt.cm.rainbow(np.linspace(0, 1, 12))
-colors = [[c[0], c[1], c[2], 1.0] for c in colors]  # Increase alpha to 1.0 for full opacity
-saturated_cmap = LinearSegmentedColormap.from_list("saturated", colors, N=12)
-
-# Plotting
-plt.figure(figsize=(14, 8))
-for i in range(12):
-    range_data = medians_df[f'Range_{i+1}']
-    plt.plot(file_dates, range_data, marker='o', label=f'Region {i+1}', color=saturated_cmap(i/12), linewidth=2)
-
-plt.xlabel('Date')
-plt.ylabel('Median Motor Noise (dB)')
-plt.title('Motor Noise Across Files')
-plt.legend(title='Regions', bbox_to_anchor=(1.05, 1), loc='upper left')
-plt.grid(True)
-plt.gcf().autofmt_xdate()  # Rotate and align the tick labels
-plt.tight_layout()
-
-# Save the plot
-plot_save_path = "/home/arce/results/median_motor_noise_across_files.png"
-os.makedirs(os.path.dirname(plot_save_path), exist_ok=True)
-plt.savefig(plot_save_path, dpi=300)
+    all_medians = []
+    file_dates = []
+
+    for file_path in file_paths:
+        file_base_name = os.path.splitext(os.path.basename(file_path))[0]
+
+        try:
+            df = pd.read_csv(file_path)
+
+            if 'Range' not in df.columns or 'Median Motor Noise (dB)' not in df.columns:
+                print(f"Skipping file {file_base_name}: Expected 'Range' or 'Median Motor Noise (dB)' column not found")
+                continue
+
+            median_values = df['Median Motor Noise (dB)'].values
+            medians = compute_median_ranges(median_values, num_ranges=12)
+
+            date = extract_date(file_base_name)
+            if date is not None:
+                all_medians.append(medians)
+                file_dates.append(date)
+            else:
+                print(f"Skipping file {file_base_name}: Unable to extract date")
+        except Exception as e:
+            print(f"Error processing file {file_base_name}: {e}")
+
+    if not file_dates:
+        return None
+
+    # Sort data by date
+    sorted_data = sorted(zip(file_dates, all_medians))
+    file_dates, all_medians = zip(*sorted_data)
+
+    # Convert to DataFrame for plotting
+    return pd.DataFrame(all_medians, index=file_dates, columns=[f'Range_{i+1}' for i in range(12)])
+
+def plot_median_ranges(medians_df, plot_save_path):
+    """Plots the range medians of every file against its date."""
+    file_dates = medians_df.index
+
+    # Create a custom colormap with more saturated colors
+    colors = plt.cm.rainbow(np.linspace(0, 1, 12))
+    colors = [[c[0], c[1], c[2], 1.0] for c in colors]  # Increase alpha to 1.0 for full opacity
+    saturated_cmap = LinearSegmentedColormap.from_list("saturated", colors, N=12)
+
+    # Plotting
+    plt.figure(figsize=(14, 8))
+    for i in range(12):
+        range_data = medians_df[f'Range_{i+1}']
+        plt.plot(file_dates, range_data, marker='o', label=f'Region {i+1}', color=saturated_cmap(i/12), linewidth=2)
+
+    plt.xlabel('Date')
+    plt.ylabel('Median Motor Noise (dB)')
+    plt.title('Motor Noise Across Files')
+    plt.legend(title='Regions', bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.grid(True)
+    plt.gcf().autofmt_xdate()  # Rotate and align the tick labels
+    plt.tight_layout()
+
+    # Save the plot
+    os.makedirs(os.path.dirname(plot_save_path), exist_ok=True)
+    plt.savefig(plot_save_path, dpi=300)
+
+    # Show the plot
+    plotting.finish_figure()
+    print(f"Plot saved to {plot_save_path}!")
+
+def create_plot(folder_path=folder_path, plot_save_path=plot_save_path):
+    """Loads the anomaly medians and saves the plot; returns False if there is nothing to plot."""
+    with profiling.stage('load_median_ranges'):
+        medians_df = load_median_ranges(folder_path)
+    if medians_df is None:
+        print("No valid data to plot. Please check your file names and data.")
+        return False
+    with profiling.stage('plot_median_ranges', files=len(medians_df)):
+        plot_median_ranges(medians_df, plot_save_path)
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plots the 12 range medians of every anomaly file against its date.")
+    parser.add_argument("--folder", default=folder_path, help="Folder with the *_anomaly.csv files")
+    parser.add_argument("--output", default=plot_save_path)
+    profiling.add_argument(parser)
+    args = parser.parse_args()
 
-# Show the plot
-plt.show()
-print(f"Plot saved to {plot_save_path}!")
+    with profiling.session(args.profile):
+        plotted = create_plot(args.folder, args.output)
+    if not plotted:
+        exit()
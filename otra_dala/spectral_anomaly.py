@@ -0,0 +1,131 @@
+import argparse
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import spectrum_store
+import profiling
+
+# Bāzes līnija: iepriekšējo baseline_window ierakstu mediāna un MAD katrā frekvences joslā
+baseline_window = 100
+min_history = 10
+mad_to_sigma = 1.4826
+min_scale = 0.1  # dB; neļauj kvantētām vai nemainīgām joslām dot bezgalīgus novirzes rādītājus
+block_rows = 256
+
+def rolling_baseline(spectra, window=baseline_window, min_history=min_history):
+    """
+    Per-bin median and MAD of the window recordings preceding each recording (the recording itself excluded).
+    Rows with fewer than min_history earlier recordings are NaN. Returns two (n, bins) float32 arrays.
+    """
+    spectra = np.asarray(spectra, dtype=np.float32)
+    n, bins = spectra.shape
+    median = np.full((n, bins), np.nan, dtype=np.float32)
+    mad = np.full((n, bins), np.nan, dtype=np.float32)
+
+    # Sākumā vēsture ir īsāka par logu (ne vairāk kā window ieraksti)
+    for i in range(min_history, min(window, n)):
+        median[i] = np.median(spectra[:i], axis=0)
+        mad[i] = np.median(np.abs(spectra[:i] - median[i]), axis=0)
+
+    if n > window:
+        # windows[k] ir ieraksti k .. k+window-1, t.i. bāzes līnija ierakstam k+window
+        windows = sliding_window_view(spectra, window, axis=0)
+        for start in range(0, n - window, block_rows):
+            stop = min(start + block_rows, n - window)
+            block = windows[start:stop]
+            block_median = np.median(block, axis=2)
+            median[start + window:stop + window] = block_median
+            mad[start + window:stop + window] = np.median(np.abs(block - block_median[:, :, None]), axis=2)
+
+    return median, mad
+
+def robust_z(spectra, median, mad):
+    """Per-bin deviation from the baseline in robust standard deviations (MAD x 1.4826)."""
+    scale = mad_to_sigma * np.maximum(mad, min_scale)
+    return (np.asarray(spectra, dtype=np.float32) - median) / scale
+
+def score_spectra(frequencies, spectra, window=baseline_window, min_history=min_history, top=3):
+    """
+    Scores every recording against its rolling baseline.
+    Returns a dict with the score (mean |z| over bins), max_abs_z, and the top worst bins' frequencies and signed z.
+    Rows must be in time order (see score_table).
+    """
+    spectra = np.asarray(spectra, dtype=np.float32)
+    if spectra.ndim != 2 or spectra.shape[0] == 0 or spectra.shape[1] == 0:
+        # Tukša krātuve vai spektri bez joslām: nav ko vērtēt
+        n = spectra.shape[0] if spectra.ndim == 2 else 0
+        return {
+            'score': np.full(n, np.nan),
+            'max_abs_z': np.full(n, np.nan),
+            'worst_hz': np.full((n, top), np.nan),
+            'worst_z': np.full((n, top), np.nan),
+        }
+
+    median, mad = rolling_baseline(spectra, window, min_history)
+    z = robust_z(spectra, median, mad)
+    abs_z = np.abs(z)
+
+    with np.errstate(invalid='ignore'):
+        scored = ~np.all(np.isnan(z), axis=1)
+        score = np.full(len(z), np.nan)
+        score[scored] = np.nanmean(abs_z[scored], axis=1)
+
+    # Sliktākās joslas: argpartition pēc |z| (NaN nekad netiek izvēlēts)
+    ranking = np.where(np.isnan(abs_z), -np.inf, abs_z)
+    top = min(top, z.shape[1])
+    worst = np.argpartition(-ranking, top - 1, axis=1)[:, :top]
+    worst = np.take_along_axis(worst, np.argsort(-np.take_along_axis(ranking, worst, axis=1), axis=1), axis=1)
+    worst_z = np.take_along_axis(z, worst, axis=1).astype(np.float64)
+    worst_z[~scored] = np.nan
+
+    return {
+        'score': score,
+        'max_abs_z': np.where(scored, np.abs(worst_z[:, 0]), np.nan),
+        'worst_hz': np.where(scored[:, None], np.asarray(frequencies)[worst], np.nan),
+        'worst_z': worst_z,
+    }
+
+def score_table(names, frequencies, spectra, window=baseline_window, min_history=min_history, top=3):
+    """Anomaly score time series: one row per recording (sorted by time) with its score and worst bins."""
+    timestamps = np.array([spectrum_store.parse_timestamp(name) for name in names], dtype='datetime64[s]')
+    # Bāzes līnija ir iepriekšējie ieraksti, tāpēc secībai jābūt pēc laika, nevis pēc faila nosaukuma
+    order = np.argsort(timestamps, kind='stable')
+    if len(order) and np.any(order != np.arange(len(order))):
+        names = [names[i] for i in order]
+        timestamps = timestamps[order]
+        spectra = np.asarray(spectra)[order]
+    result = score_spectra(frequencies, spectra, window, min_history, top)
+    table = pd.DataFrame({
+        'Datetime': timestamps,
+        'Filename': list(names),
+        'score': result['score'],
+        'max_abs_z': result['max_abs_z'],
+    })
+    for k in range(result['worst_hz'].shape[1]):
+        table[f'worst_{k + 1}_hz'] = result['worst_hz'][:, k]
+        table[f'worst_{k + 1}_z'] = result['worst_z'][:, k]
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description="Scores every spectrum against a rolling median/MAD baseline of earlier recordings.")
+    parser.add_argument("input_path", help="Spectrum store or csv_converter CSV directory")
+    parser.add_argument("--window", type=int, default=baseline_window, help="Recordings in the trailing baseline")
+    parser.add_argument("--min-history", type=int, default=min_history, help="Recordings needed before scoring")
+    parser.add_argument("--top", type=int, default=3, help="Worst bins reported per recording")
+    parser.add_argument("--output", default="anomaly_scores.csv")
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+
+    with profiling.session(args.profile):
+        with profiling.stage('load_spectra'):
+            names, frequencies, spectra = spectrum_store.load_spectra(args.input_path)
+        with profiling.stage('score', recordings=len(names)):
+            table = score_table(names, frequencies, spectra, args.window, args.min_history, args.top)
+        with profiling.stage('write_csv'):
+            table.to_csv(args.output, index=False)
+    print(f"{len(table)} recordings scored, saved to {args.output}")
+    print(table.nlargest(10, 'score').to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+import spectrum_store
+from frequency_bands import frequency_ranges, band_slices, band_median_matrix
+
+# Pazīmju fails: fiksēta izmēra ieraksti (tikai papildināms), shēma atsevišķā JSON failā
+features_file = "features.bin"
+schema_file = "features.json"
+tracked_frequencies = (spectrum_store.c2_frequency,)
+
+def feature_dtype(tracked=tracked_frequencies, ranges=frequency_ranges):
+    """Record layout for the given tracked frequencies and bands."""
+    fields = [('timestamp', '<M8[s]'), ('name', 'S40')]
+    fields += [(f'power_{frequency:g}_hz', '<f8') for frequency in tracked]
+    fields += [(f'band_{i + 1}_median', '<f8') for i in range(len(ranges))]
+    fields += [('total_power_db', '<f8'), ('band_power_db', '<f8'), ('centroid_hz', '<f8'), ('flatness', '<f8')]
+    return np.dtype(fields)
+
+def compute_features(filenames, frequencies, spectra, tracked=tracked_frequencies, ranges=frequency_ranges):
+    """
+    Computes one feature record per spectrum (dB rows of a recordings x bins matrix):
+    power at each tracked frequency (nearest bin, as the C2 value), the band medians of 12_median_filter,
+    total power over all bins and inside the bands (dB), spectral centroid (Hz) and spectral flatness.
+    """
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    spectra = np.atleast_2d(np.asarray(spectra, dtype=np.float64))
+    records = np.empty(len(filenames), dtype=feature_dtype(tracked, ranges))
+    records['timestamp'] = [spectrum_store.parse_timestamp(f) for f in filenames]
+    records['name'] = spectrum_store.encode_names(filenames, records.dtype['name'].itemsize)
+
+    for frequency in tracked:
+        records[f'power_{frequency:g}_hz'] = spectra[:, np.argmin(np.abs(frequencies - frequency))]
+    for i, medians in enumerate(band_median_matrix(frequencies, spectra, ranges).T):
+        records[f'band_{i + 1}_median'] = medians
+
+    linear = 10 ** (spectra / 10)
+    in_bands = np.zeros(frequencies.size, dtype=bool)
+    for band in band_slices(frequencies, ranges):
+        in_bands[band] = True
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total = linear.sum(axis=1)
+        records['total_power_db'] = 10 * np.log10(total)
+        records['band_power_db'] = 10 * np.log10(linear[:, in_bands].sum(axis=1))
+        records['centroid_hz'] = linear @ frequencies / total
+        # Ģeometriskais / aritmētiskais vidējais; ln(10^(dB/10)) = dB * ln(10) / 10
+        records['flatness'] = np.exp(np.mean(spectra, axis=1) * np.log(10) / 10) / np.mean(linear, axis=1)
+    return records
+
+def _schema_path(path):
+    return os.path.join(path, schema_file)
+
+def read_schema(path):
+    """Returns the record dtype stored in path, or None if there is no features file yet."""
+    if not os.path.exists(_schema_path(path)):
+        return None
+    with open(_schema_path(path), 'r', encoding='utf-8') as f:
+        return np.dtype([tuple(field) for field in json.load(f)['fields']])
+
+def append_features(path, records):
+    """Appends feature records to path/features.bin; the record layout must match the existing file."""
+    os.makedirs(path, exist_ok=True)
+    schema = read_schema(path)
+    if schema is None:
+        tmp_path = _schema_path(path) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fields': records.dtype.descr}, f)
+        os.replace(tmp_path, _schema_path(path))
+    elif schema != records.dtype:
+        raise ValueError(f"Feature set differs from the one stored in {path}; use a new features directory")
+
+    # Nogriež nepabeigtu pēdējo ierakstu (kā spectrum_store)
+    data_path = os.path.join(path, features_file)
+    if os.path.exists(data_path):
+        size = os.path.getsize(data_path)
+        if size % records.dtype.itemsize:
+            os.truncate(data_path, size - size % records.dtype.itemsize)
+    with open(data_path, 'ab') as f:
+        f.write(records.tobytes())
+
+def load_features(path):
+    """Returns every stored feature record as a structured array (memory-mapped)."""
+    schema = read_schema(path)
+    data_path = os.path.join(path, features_file)
+    if schema is None:
+        return np.empty(0, dtype=feature_dtype())
+    count = os.path.getsize(data_path) // schema.itemsize if os.path.exists(data_path) else 0
+    if count == 0:
+        return np.empty(0, dtype=schema)
+    return np.memmap(data_path, dtype=schema, mode='r', shape=(count,))
+
+def features_frame(path):
+    """Stored features as a DataFrame (name decoded), e.g. for plotting a health indicator over time."""
+    records = load_features(path)
+    if len(records):
+        # Atkārtoti konvertēts ieraksts aizstāj iepriekšējo (kā spectrum_store.load_store)
+        records = records[spectrum_store.latest_rows(records)]
+    frame = pd.DataFrame({name: records[name] for name in records.dtype.names})
+    frame['name'] = frame['name'].str.decode('utf-8')
+    return frame
@@ -0,0 +1,185 @@
+import os
+import json
+import zlib
+import argparse
+import numpy as np
+
+# Samazināta izšķirtspēja: time_factor secīgi segmenti -> viens kadrs, freq_factor blakus joslas -> viena josla
+time_factor = 16
+freq_factor = 4
+chunk_frames = 256  # Kadri vienā saspiestā blokā (atsevišķi atspiežams, lai vaicājums nelasa visu failu)
+db_min = -80.0
+db_step = 0.5  # uint8 kvantēšana: db_min .. db_min + 255 * db_step
+spectrogram_suffix = ".spg"
+
+def spectrogram_paths(output_path, filename):
+    """Data and metadata file of a recording's spectrogram."""
+    data_path = os.path.join(output_path, os.path.splitext(filename)[0] + spectrogram_suffix)
+    return data_path, data_path + '.json'
+
+class SpectrogramWriter:
+    """
+    Collects per-segment dB spectra block by block (as they come out of the FFT loop) and writes a
+    reduced, uint8-quantized, zlib-compressed spectrogram. Memory use is bounded by one chunk of frames.
+    In time each frame keeps the maximum over its segments, so that short impacts are not averaged away;
+    in frequency neighbouring bins are averaged.
+    """
+
+    def __init__(self, output_path, filename, frequencies, fs, step, segment_size,
+                 time_factor=time_factor, freq_factor=freq_factor, chunk_frames=chunk_frames):
+        os.makedirs(output_path, exist_ok=True)
+        self.data_path, self.meta_path = spectrogram_paths(output_path, filename)
+        self.tmp_path = self.data_path + '.tmp'
+        self.file = open(self.tmp_path, 'wb')
+
+        self.bin_starts = np.arange(0, len(frequencies), freq_factor)
+        self.frequencies = np.add.reduceat(frequencies, self.bin_starts) / np.diff(np.r_[self.bin_starts, len(frequencies)])
+        self.metadata = {
+            'fs': fs, 'step': step, 'segment_size': segment_size,
+            'time_factor': time_factor, 'freq_factor': freq_factor, 'chunk_frames': chunk_frames,
+            'db_min': db_min, 'db_step': db_step, 'frequencies': self.frequencies.tolist(),
+            'frames': 0, 'chunks': [], 'last_frame_segments': time_factor,
+        }
+        self.pending_segments = np.empty((0, len(frequencies)), dtype=np.float32)
+        self.frames = []
+
+    def add(self, power_db):
+        """Adds a (segments, bins) block of dB spectra in segment order."""
+        segments = np.concatenate([self.pending_segments, np.asarray(power_db, dtype=np.float32)])
+        full = len(segments) // self.metadata['time_factor'] * self.metadata['time_factor']
+        if full:
+            self._add_frames(segments[:full])
+        self.pending_segments = segments[full:]
+
+    def _add_frames(self, segments):
+        factor = self.metadata['time_factor']
+        frames = np.maximum.reduceat(segments, np.arange(0, len(segments), factor), axis=0)
+        frames = np.add.reduceat(frames, self.bin_starts, axis=1) / np.diff(np.r_[self.bin_starts, segments.shape[1]])
+        self.frames.extend(self._quantize(frames))
+        while len(self.frames) >= self.metadata['chunk_frames']:
+            self._flush(self.metadata['chunk_frames'])
+
+    def _quantize(self, frames):
+        levels = np.rint((frames - db_min) / db_step)
+        return np.clip(np.nan_to_num(levels, nan=0.0, neginf=0.0, posinf=255.0), 0, 255).astype(np.uint8)
+
+    def _flush(self, count):
+        block = np.stack(self.frames[:count])
+        del self.frames[:count]
+        compressed = zlib.compress(block.tobytes(), 6)
+        self.metadata['chunks'].append([self.file.tell(), len(compressed), len(block)])
+        self.file.write(compressed)
+        self.metadata['frames'] += len(block)
+
+    def close(self):
+        """Writes the last (possibly shorter) frame and chunk, then replaces both files in one step each."""
+        if len(self.pending_segments):
+            # Pēdējais kadrs ir īsāks: tā segmentu skaits vajadzīgs kadra laika centram
+            self.metadata['last_frame_segments'] = len(self.pending_segments)
+            self._add_frames(self.pending_segments)
+            self.pending_segments = self.pending_segments[:0]
+        if self.frames:
+            self._flush(len(self.frames))
+        self.file.close()
+        os.replace(self.tmp_path, self.data_path)
+
+        tmp_meta = self.meta_path + '.tmp'
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(self.metadata, f)
+        os.replace(tmp_meta, self.meta_path)
+        return self.data_path
+
+    def abort(self):
+        """Closes the file and removes the partial .tmp file; the previous spectrogram (if any) stays as it was."""
+        if not self.file.closed:
+            self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+def read_metadata(data_path):
+    with open(data_path + '.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def frame_times(metadata, frames):
+    """Centre time (s from the start of the recording) of the given frame numbers; the last frame may be shorter."""
+    factor, step = metadata['time_factor'], metadata['step']
+    frames = np.asarray(frames)
+    segments = np.where(frames == metadata['frames'] - 1, metadata.get('last_frame_segments', factor), factor)
+    return (frames * factor * step + ((segments - 1) * step + metadata['segment_size']) / 2) / metadata['fs']
+
+def read_frames(data_path, first, last, metadata=None):
+    """Dequantized dB frames [first, last); only the chunks that contain them are decompressed."""
+    metadata = metadata or read_metadata(data_path)
+    first, last = max(first, 0), min(last, metadata['frames'])
+    n_bins = len(metadata['frequencies'])
+    if last <= first:
+        return np.empty((0, n_bins), dtype=np.float32)
+
+    size = metadata['chunk_frames']
+    blocks = []
+    with open(data_path, 'rb') as f:
+        for offset, length, count in metadata['chunks'][first // size:(last - 1) // size + 1]:
+            f.seek(offset)
+            blocks.append(np.frombuffer(zlib.decompress(f.read(length)), dtype=np.uint8).reshape(count, n_bins))
+    start = first - first // size * size
+    levels = np.concatenate(blocks)[start:start + last - first]
+    return metadata['db_min'] + levels.astype(np.float32) * metadata['db_step']
+
+def time_slice(data_path, offset_s, span_s=1.0):
+    """
+    Spectrogram around offset_s seconds into the recording (span_s seconds in total).
+    Returns (frame times in s, frequencies, (frames, bins) dB matrix).
+    """
+    metadata = read_metadata(data_path)
+    frame_s = metadata['time_factor'] * metadata['step'] / metadata['fs']
+    first = int(np.floor((offset_s - span_s / 2) / frame_s))
+    last = int(np.ceil((offset_s + span_s / 2) / frame_s)) + 1
+    levels = read_frames(data_path, first, last, metadata)
+    first = max(first, 0)
+    return frame_times(metadata, np.arange(first, first + len(levels))), np.asarray(metadata['frequencies']), levels
+
+def loudest_frames(data_path, top=5, min_hz=0.0):
+    """Times (s) of the top frames by mean level above min_hz, read chunk by chunk (candidate transients)."""
+    metadata = read_metadata(data_path)
+    bins = np.asarray(metadata['frequencies']) >= min_hz
+    size = metadata['chunk_frames']
+    levels = np.concatenate([read_frames(data_path, first, first + size, metadata)[:, bins].mean(axis=1)
+                             for first in range(0, metadata['frames'], size)] or [np.empty(0)])
+    order = np.argsort(levels)[::-1][:top]
+    return frame_times(metadata, order), levels[order]
+
+def main():
+    parser = argparse.ArgumentParser(description="Prints or plots a time slice of a stored spectrogram.")
+    parser.add_argument("spectrogram", help=f"{spectrogram_suffix} file written by csv_converter --spectrogram")
+    parser.add_argument("--offset", type=float, default=None, help="Slice centre (s); loudest frame by default")
+    parser.add_argument("--span", type=float, default=1.0, help="Slice length (s)")
+    parser.add_argument("--min-hz", type=float, default=0.0, help="Lowest frequency used to find the loudest frame")
+    parser.add_argument("--plot", action="store_true", help="Show the slice as an image")
+    args = parser.parse_args()
+
+    if read_metadata(args.spectrogram)['frames'] == 0:
+        # Ieraksts ir īsāks par vienu segmentu
+        print(f"{args.spectrogram} has no frames")
+        return
+
+    if args.offset is None:
+        times, levels = loudest_frames(args.spectrogram, top=5, min_hz=args.min_hz)
+        for t, level in zip(times, levels):
+            print(f"{t:9.3f} s  {level:7.2f} dB")
+        offset = times[0]
+    else:
+        offset = args.offset
+
+    times, frequencies, levels = time_slice(args.spectrogram, offset, args.span)
+    print(f"{len(times)} frames x {len(frequencies)} bins around {offset:.3f} s")
+    if args.plot:
+        import matplotlib.pyplot as plt
+        from plotting import finish_figure
+        plt.pcolormesh(times, frequencies, levels.T, shading='nearest')
+        plt.xlabel('Laiks (s)')
+        plt.ylabel('Frekvence (Hz)')
+        plt.colorbar(label='Jaudas spektrs (dB)')
+        finish_figure()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import os
+import csv
+import datetime
+import numpy as np
+import pandas as pd
+
+# Krātuves failu nosaukumi
+frequencies_file = "frequencies.npy"
+spectra_file = "spectra.f32"
+index_file = "index.bin"
+
+# Viens indeksa ieraksts katram spektram (fiksēta izmēra, lai failu var tikai papildināt)
+index_dtype = np.dtype([('timestamp', '<M8[s]'), ('name', 'S40'), ('c2_value', '<f8')])
+c2_frequency = 18000
+
+def is_store(path):
+    """Returns True if the folder contains a spectrum store."""
+    return os.path.exists(os.path.join(path, frequencies_file))
+
+def parse_timestamp(filename):
+    """Parses the recording time from a YYYY_MM_DD___HH-MM-SS file name (NaT if it does not match)."""
+    try:
+        date_time = datetime.datetime.strptime(filename.split('.')[0].replace('_', ' '), '%Y %m %d %H-%M-%S')
+    except ValueError:
+        return np.datetime64('NaT', 's')
+    return np.datetime64(date_time, 's')
+
+def encode_names(filenames, width=index_dtype['name'].itemsize):
+    """
+    Recording names (file names without extension) as bytes for a fixed-width name field. Raises ValueError
+    if one is longer than the field: numpy would truncate it silently, and latest_rows could then merge
+    two different recordings.
+    """
+    names = [os.path.splitext(f)[0].encode() for f in filenames]
+    too_long = [name.decode() for name in names if len(name) > width]
+    if too_long:
+        raise ValueError(f"Recording name longer than {width} bytes: {too_long[0]!r}")
+    return names
+
+def _row_count(store_path, n_bins):
+    """Number of complete records, ignoring a partially appended tail."""
+    index_path = os.path.join(store_path, index_file)
+    spectra_path = os.path.join(store_path, spectra_file)
+    index_rows = os.path.getsize(index_path) // index_dtype.itemsize if os.path.exists(index_path) else 0
+    spectra_rows = os.path.getsize(spectra_path) // (4 * n_bins) if os.path.exists(spectra_path) else 0
+    return min(index_rows, spectra_rows)
+
+def append_spectra(store_path, filenames, frequencies, spectra):
+    """Appends spectra (one row per recording) to the store, creating it if needed."""
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    spectra = np.atleast_2d(np.asarray(spectra, dtype=np.float64))
+    if spectra.shape != (len(filenames), frequencies.size):
+        raise ValueError(f"Expected {len(filenames)} spectra with {frequencies.size} bins, got {spectra.shape}")
+
+    names = encode_names(filenames)
+
+    os.makedirs(store_path, exist_ok=True)
+    frequencies_path = os.path.join(store_path, frequencies_file)
+    if os.path.exists(frequencies_path):
+        if not np.array_equal(np.load(frequencies_path), frequencies):
+            raise ValueError(f"Frequency axis does not match the store in {store_path}")
+    else:
+        np.save(frequencies_path, frequencies)
+
+    # Nogriež ierakstu, kas palicis nepabeigts pēc pārtrauktas papildināšanas
+    rows = _row_count(store_path, frequencies.size)
+    for name, row_size in ((spectra_file, 4 * frequencies.size), (index_file, index_dtype.itemsize)):
+        path = os.path.join(store_path, name)
+        if os.path.exists(path) and os.path.getsize(path) > rows * row_size:
+            os.truncate(path, rows * row_size)
+
+    index = np.empty(len(filenames), dtype=index_dtype)
+    index['timestamp'] = [parse_timestamp(f) for f in filenames]
+    index['name'] = names
+    index['c2_value'] = spectra[:, np.argmin(np.abs(frequencies - c2_frequency))]
+
+    # Spektri tiek pierakstīti pirms indeksa, tāpēc indekss nekad nenorāda uz trūkstošiem datiem
+    with open(os.path.join(store_path, spectra_file), 'ab') as f:
+        f.write(spectra.astype(np.float32).tobytes())
+    with open(os.path.join(store_path, index_file), 'ab') as f:
+        f.write(index.tobytes())
+
+    return rows + len(filenames)
+
+def append_spectrum(store_path, filename, frequencies, spectrum_data):
+    """Appends a single recording's spectrum to the store."""
+    return append_spectra(store_path, [filename], frequencies, [spectrum_data])
+
+def latest_rows(index):
+    """
+    Row numbers of the latest record of every name, in time order. A re-converted recording
+    (or one appended again after a crash before the manifest was written) replaces its earlier rows.
+    """
+    names = index['name']
+    # np.unique apgrieztā secībā atrod katra nosaukuma pēdējo ierakstu
+    _, first_reversed = np.unique(names[::-1], return_index=True)
+    rows = len(names) - 1 - first_reversed
+    return rows[np.argsort(index['timestamp'][rows], kind='stable')]
+
+def load_store(store_path):
+    """
+    Returns the frequency axis, the index records and a (recordings x bins) float32 matrix: one row per
+    recording (the latest one), sorted by timestamp. The matrix is memory-mapped unless rows had to be
+    dropped or reordered.
+    """
+    frequencies = np.load(os.path.join(store_path, frequencies_file))
+    rows = _row_count(store_path, frequencies.size)
+    if rows == 0:
+        return frequencies, np.empty(0, dtype=index_dtype), np.empty((0, frequencies.size), dtype=np.float32)
+
+    index = np.fromfile(os.path.join(store_path, index_file), dtype=index_dtype, count=rows)
+    spectra = np.memmap(os.path.join(store_path, spectra_file), dtype=np.float32, mode='r',
+                        shape=(rows, frequencies.size))
+    keep = latest_rows(index)
+    if len(keep) == rows and np.array_equal(keep, np.arange(rows)):
+        return frequencies, index, spectra
+    return frequencies, index[keep], np.asarray(spectra[keep])
+
+def read_spectrum_csv(file_path):
+    """Reads the frequency and power columns of one converter CSV (header and C2 row skipped)."""
+    values = pd.read_csv(file_path, usecols=[0, 1], skiprows=2, header=None).to_numpy(dtype=np.float64)
+    return values[:, 0], values[:, 1]
+
+def load_spectra(path):
+    """Returns (names, frequencies, spectra matrix) from a spectrum store or a folder of converter CSVs."""
+    if is_store(path):
+        frequencies, index, spectra = load_store(path)
+        return [name.decode() for name in index['name']], frequencies, spectra
+
+    csv_files = sorted(f for f in os.listdir(path) if f.endswith('.csv'))
+    frequencies = None
+    spectra = []
+    for filename in csv_files:
+        file_frequencies, power = read_spectrum_csv(os.path.join(path, filename))
+        if frequencies is None:
+            frequencies = file_frequencies
+        elif not np.array_equal(frequencies, file_frequencies):
+            raise ValueError(f"Frequency axis of {filename} differs from the other files")
+        spectra.append(power)
+
+    if frequencies is None:
+        return [], np.empty(0), np.empty((0, 0), dtype=np.float32)
+    names = [os.path.splitext(f)[0] for f in csv_files]
+    # Tāda pati secība kā krātuvei: pēc ieraksta laika
+    order = np.argsort(np.array([parse_timestamp(name) for name in names]), kind='stable')
+    return [names[i] for i in order], frequencies, np.vstack(spectra)[order]
+
+def export_csv(store_path, output_path):
+    """Writes every stored spectrum out as a csv_converter style CSV file."""
+    frequencies, index, spectra = load_store(store_path)
+    os.makedirs(output_path, exist_ok=True)
+
+    csv_paths = []
+    for record, spectrum_data in zip(index, spectra):
+        csv_filepath = os.path.join(output_path, record['name'].decode() + '.csv')
+        with open(csv_filepath, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['Frekvence (Hz)', 'Jaudas spektrs (dB)', '18000 Hz Vērtība'])
+            writer.writerow(['', '', f"{record['c2_value']}"])
+            for freq, power in zip(frequencies, spectrum_data.astype(np.float64)):
+                writer.writerow([freq, power, ''])
+        csv_paths.append(csv_filepath)
+
+    return csv_paths
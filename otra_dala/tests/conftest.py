@@ -0,0 +1,5 @@
+import os
+import sys
+
+# otra_dala skripti tiek importēti pēc moduļa nosaukuma (kā tos palaižot no šīs direktorijas)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
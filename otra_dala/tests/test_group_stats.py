@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+import group_stats
+
+def test_group_quantiles_match_numpy_percentile():
+    rng = np.random.default_rng(0)
+    keys = rng.integers(0, 20, 2000)
+    values = rng.normal(size=2000)
+    values[rng.random(2000) < 0.1] = np.nan
+    q = [0, 8.3, 25, 50, 75, 91.7, 100]
+
+    groups, result = group_stats.group_quantiles(keys, values, q)
+    np.testing.assert_array_equal(groups, np.unique(keys))
+    for group, row in zip(groups, result):
+        group_values = values[(keys == group) & ~np.isnan(values)]
+        np.testing.assert_allclose(row, np.percentile(group_values, q))
+
+def test_time_group_keys():
+    datetimes = np.array(['2024-06-26T07:59:59', '2024-06-26T08:00:00', '2024-06-30T23:00:00'], dtype='datetime64[s]')
+    np.testing.assert_array_equal(group_stats.time_group_keys(datetimes, 'day'),
+                                  np.array(['2024-06-26', '2024-06-26', '2024-06-30'], dtype='datetime64[D]'))
+    # 2024-06-24 ir pirmdiena
+    np.testing.assert_array_equal(group_stats.time_group_keys(datetimes, 'week'),
+                                  np.array(['2024-06-24'] * 3, dtype='datetime64[D]'))
+    np.testing.assert_array_equal(group_stats.time_group_keys(datetimes, 'shift'),
+                                  np.array(['2024-06-26T00', '2024-06-26T08', '2024-06-30T16'], dtype='datetime64[h]'))
+
+def test_percentile_range_table_matches_pandas_quantile():
+    rng = np.random.default_rng(1)
+    datetimes = np.datetime64('2024-06-25T00:00', 's') + rng.integers(0, 5 * 86400, 1000).astype('timedelta64[s]')
+    values = rng.normal(size=1000)
+
+    table = group_stats.percentile_range_table(datetimes, values, num_ranges=12)
+    frame = pd.DataFrame({'day': datetimes.astype('datetime64[D]'), 'value': values})
+    expected = frame.groupby('day')['value'].quantile(np.linspace(0, 1, 13)[1:]).to_numpy()
+    np.testing.assert_allclose(table['Value'], expected)
+    assert table['Range'].max() == 12
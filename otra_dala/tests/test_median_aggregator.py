@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import c2_scan
+from median_aggregator import MedianAggregator
+
+def c2_values(timestamps, values):
+    records = np.empty(len(values), dtype=c2_scan.c2_dtype)
+    records['timestamp'] = timestamps
+    records['c2_value'] = values
+    return records
+
+def random_values(seed, count=500):
+    rng = np.random.default_rng(seed)
+    seconds = np.sort(rng.choice(3 * 24 * 3600, count, replace=False))
+    values = rng.normal(-30, 5, count)
+    values[rng.random(count) < 0.05] = np.nan
+    return c2_values(np.datetime64('2024-06-25T00:00', 's') + seconds.astype('timedelta64[s]'), values)
+
+def pandas_medians(records, bucket='h'):
+    series = pd.Series(records['c2_value'], index=pd.DatetimeIndex(records['timestamp']))
+    return series.resample(bucket).median().dropna()
+
+@pytest.mark.parametrize('bucket', ['15min', 'h', 'D'])
+def test_bucket_medians_match_pandas(tmp_path, bucket):
+    records = random_values(0)
+    aggregator = MedianAggregator(tmp_path / 'state', bucket=bucket)
+    # Pa daļām, kā tiešsaistes režīmā
+    for part in np.array_split(records, 7):
+        aggregator.add(part)
+
+    table = aggregator.median_table()
+    expected = pandas_medians(records, bucket)
+    np.testing.assert_array_equal(table['timestamp'], expected.index.values.astype('datetime64[s]'))
+    np.testing.assert_allclose(table['c2_value'], expected.values)
+
+def test_state_is_reloaded_and_replacements_win(tmp_path):
+    records = random_values(1)
+    MedianAggregator(tmp_path / 'state').add(records)
+
+    # Atkārtoti konvertēti ieraksti aizstāj iepriekšējās vērtības
+    changed = records[::10].copy()
+    changed['c2_value'] += 100
+    aggregator = MedianAggregator(tmp_path / 'state')
+    aggregator.add(changed)
+
+    updated = records.copy()
+    updated[::10] = changed
+    expected = pandas_medians(updated)
+    np.testing.assert_allclose(aggregator.median_table()['c2_value'], expected.values)
+    np.testing.assert_allclose(MedianAggregator(tmp_path / 'state').median_table()['c2_value'], expected.values)
+
+def test_csv_matches_hourly_medians_format(tmp_path):
+    records = random_values(2)
+    aggregator = MedianAggregator(tmp_path / 'state')
+    aggregator.add(records)
+    csv_path = aggregator.save_csv(str(tmp_path / 'hourly.csv'))
+
+    saved = pd.read_csv(csv_path, parse_dates=['Datetime'])
+    expected = pandas_medians(records)
+    assert list(saved.columns) == ['Datetime', 'C2 Value']
+    np.testing.assert_array_equal(saved['Datetime'].values, expected.index.values)
+    np.testing.assert_allclose(saved['C2 Value'], expected.values)
+
+def test_updated_csv_matches_full_rewrite(tmp_path):
+    records = random_values(3)
+    aggregator = MedianAggregator(tmp_path / 'state')
+    csv_path = str(tmp_path / 'hourly.csv')
+    # Jauni ieraksti, kā arī vēlu pienākuši ieraksti vidū un pirms pirmā intervāla
+    parts = np.array_split(records[len(records) // 10:], 5) + [records[::25], records[:len(records) // 10]]
+    for part in parts:
+        aggregator.update_csv(csv_path, aggregator.add(part))
+        with open(csv_path, 'rb') as f:
+            updated = f.read()
+        with open(aggregator.save_csv(str(tmp_path / 'full.csv')), 'rb') as f:
+            assert updated == f.read()
+
+def test_bucket_width_must_match_state(tmp_path):
+    MedianAggregator(tmp_path / 'state', bucket='h')
+    with pytest.raises(ValueError):
+        MedianAggregator(tmp_path / 'state', bucket='D')
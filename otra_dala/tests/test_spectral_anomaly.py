@@ -0,0 +1,44 @@
+import numpy as np
+
+import spectral_anomaly
+
+def reference_baseline(spectra, window, min_history):
+    median = np.full(spectra.shape, np.nan)
+    mad = np.full(spectra.shape, np.nan)
+    for i in range(min_history, len(spectra)):
+        history = spectra[max(0, i - window):i]
+        median[i] = np.median(history, axis=0)
+        mad[i] = np.median(np.abs(history - median[i]), axis=0)
+    return median, mad
+
+def test_rolling_baseline_matches_reference():
+    spectra = np.random.default_rng(0).normal(-40, 3, (70, 9)).astype(np.float32)
+    # Mazs bloks, lai tiktu pārbaudītas arī bloku robežas
+    spectral_anomaly.block_rows, block_rows = 7, spectral_anomaly.block_rows
+    try:
+        median, mad = spectral_anomaly.rolling_baseline(spectra, window=20, min_history=5)
+    finally:
+        spectral_anomaly.block_rows = block_rows
+
+    expected_median, expected_mad = reference_baseline(spectra, 20, 5)
+    np.testing.assert_allclose(median, expected_median, rtol=1e-5)
+    np.testing.assert_allclose(mad, expected_mad, rtol=1e-5, atol=1e-5)
+
+def test_outlier_gets_the_highest_score():
+    spectra = np.random.default_rng(1).normal(-40, 1, (60, 16))
+    spectra[45, 3] += 30
+    frequencies = np.arange(16) * 100.0
+
+    result = spectral_anomaly.score_spectra(frequencies, spectra, window=30, min_history=10)
+    assert np.all(np.isnan(result['score'][:10]))
+    assert np.nanargmax(result['max_abs_z']) == 45
+    assert result['worst_hz'][45, 0] == 300.0
+
+def test_empty_input_and_time_order():
+    table = spectral_anomaly.score_table([], np.empty(0), np.empty((0, 0), dtype=np.float32))
+    assert table.empty
+
+    names = ['2024_06_25___09-42-00', '2024_06_25___09-40-00', '2024_06_25___09-41-00']
+    spectra = np.array([[3.0], [1.0], [2.0]])
+    table = spectral_anomaly.score_table(names, np.array([18000.0]), spectra, window=5, min_history=1)
+    assert list(table['Filename']) == sorted(names)
@@ -0,0 +1,60 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+import spectrum_store
+
+frequencies = np.linspace(0, 48000, 9)
+
+def spectrum(value):
+    return np.full(frequencies.size, value, dtype=np.float64)
+
+def test_append_and_load_round_trip(tmp_path):
+    names = ['2024_06_25___09-40-00.bin', '2024_06_25___09-41-00.bin']
+    spectrum_store.append_spectra(tmp_path, names, frequencies, [spectrum(1.0), spectrum(2.0)])
+
+    loaded_frequencies, index, spectra = spectrum_store.load_store(tmp_path)
+    np.testing.assert_array_equal(loaded_frequencies, frequencies)
+    assert [name.decode() for name in index['name']] == ['2024_06_25___09-40-00', '2024_06_25___09-41-00']
+    np.testing.assert_array_equal(spectra, [spectrum(1.0), spectrum(2.0)])
+    np.testing.assert_array_equal(index['c2_value'], [1.0, 2.0])
+
+def test_reconverted_recording_is_latest_wins_in_time_order(tmp_path):
+    spectrum_store.append_spectrum(tmp_path, '2024_06_25___09-41-00.bin', frequencies, spectrum(1.0))
+    spectrum_store.append_spectrum(tmp_path, '2024_06_25___09-40-00.bin', frequencies, spectrum(2.0))
+    spectrum_store.append_spectrum(tmp_path, '2024_06_25___09-41-00.bin', frequencies, spectrum(3.0))
+
+    _, index, spectra = spectrum_store.load_store(tmp_path)
+    assert [name.decode() for name in index['name']] == ['2024_06_25___09-40-00', '2024_06_25___09-41-00']
+    np.testing.assert_array_equal(spectra[:, 0], [2.0, 3.0])
+
+    names, _, csv_spectra = spectrum_store.load_spectra(tmp_path)
+    assert names == ['2024_06_25___09-40-00', '2024_06_25___09-41-00']
+    np.testing.assert_array_equal(csv_spectra[:, 0], [2.0, 3.0])
+
+def test_partial_tail_is_ignored_and_truncated(tmp_path):
+    spectrum_store.append_spectrum(tmp_path, '2024_06_25___09-40-00.bin', frequencies, spectrum(1.0))
+    # Pārtraukta papildināšana: spektrs pierakstīts, indekss nē
+    with open(os.path.join(tmp_path, spectrum_store.spectra_file), 'ab') as f:
+        f.write(spectrum(9.0).astype(np.float32).tobytes()[:10])
+    assert len(spectrum_store.load_store(tmp_path)[1]) == 1
+
+    assert spectrum_store.append_spectrum(tmp_path, '2024_06_25___09-41-00.bin', frequencies, spectrum(2.0)) == 2
+    np.testing.assert_array_equal(spectrum_store.load_store(tmp_path)[2][:, 0], [1.0, 2.0])
+
+def test_long_names_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        spectrum_store.append_spectrum(tmp_path, 'x' * 41 + '.bin', frequencies, spectrum(1.0))
+
+def test_latest_rows_matches_pandas_drop_duplicates():
+    rng = np.random.default_rng(0)
+    index = np.empty(200, dtype=spectrum_store.index_dtype)
+    minutes = rng.integers(0, 50, len(index))
+    index['timestamp'] = np.datetime64('2024-06-25T09:00', 's') + minutes * np.timedelta64(60, 's')
+    index['name'] = [f'rec_{m:03d}'.encode() for m in minutes]
+
+    rows = spectrum_store.latest_rows(index)
+    frame = pd.DataFrame({'name': index['name'], 'timestamp': index['timestamp']})
+    expected = frame.drop_duplicates('name', keep='last').sort_values('timestamp', kind='stable').index
+    np.testing.assert_array_equal(rows, expected)
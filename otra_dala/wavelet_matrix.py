@@ -0,0 +1,63 @@
+import numpy as np
+
+class WaveletMatrix:
+    """
+    Static rank structure over a sequence: the k-th smallest value of any index range [l, r)
+    takes one step per bit of the sequence length, and many ranges are answered at once with numpy.
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        order = np.argsort(values, kind='stable')
+        self.sorted_values = values[order]
+        ranks = np.empty(len(values), dtype=np.int32)
+        ranks[order] = np.arange(len(values), dtype=np.int32)
+
+        self.levels = max(int(len(values) - 1).bit_length(), 1)
+        self.zero_prefix = []
+        self.zero_count = []
+        current = ranks
+        for level in range(self.levels):
+            is_zero = ((current >> (self.levels - 1 - level)) & 1) == 0
+            # zero_prefix[i] = nulles bitu skaits pirmajos i elementos šajā līmenī
+            prefix = np.zeros(len(values) + 1, dtype=np.int32)
+            np.cumsum(is_zero, dtype=np.int32, out=prefix[1:])
+            self.zero_prefix.append(prefix)
+            self.zero_count.append(int(prefix[-1]))
+            current = np.concatenate([current[is_zero], current[~is_zero]])
+
+    def kth_smallest(self, left, right, k):
+        """k-th smallest value (0-based) in each range [left, right); the arrays are broadcast together."""
+        left, right, k = (np.array(a, dtype=np.int32) for a in np.broadcast_arrays(left, right, k))
+        rank = np.zeros_like(k)
+        for level in range(self.levels):
+            prefix = self.zero_prefix[level]
+            zeros_left, zeros_right = prefix[left], prefix[right]
+            zeros = zeros_right - zeros_left
+            go_right = k >= zeros
+            # Nulles bits: paliek nullu daļā; vieninieks: pāriet uz vieninieku daļu aiz visām nullēm
+            k -= zeros * go_right
+            zero_count = self.zero_count[level]
+            left = zeros_left + go_right * (zero_count + left - 2 * zeros_left)
+            right = zeros_right + go_right * (zero_count + right - 2 * zeros_right)
+            rank = (rank << 1) | go_right
+        return self.sorted_values[rank]
+
+    def range_quantiles(self, left, right, q):
+        """
+        q-quantiles (0..1, linear interpolation as np.percentile) of each range [left, right).
+        Returns a (ranges, len(q)) array, NaN for empty ranges.
+        """
+        left, right = np.asarray(left, dtype=np.int64), np.asarray(right, dtype=np.int64)
+        length = right - left
+        empty = length <= 0
+        left, right = np.where(empty, 0, left), np.where(empty, 1, right)
+        virtual = (right - left - 1)[:, None] * np.asarray(q, dtype=np.float64)[None, :]
+        below = np.floor(virtual).astype(np.int64)
+        gamma = virtual - below
+        a = self.kth_smallest(left[:, None], right[:, None], below)
+        b = self.kth_smallest(left[:, None], right[:, None], np.minimum(below + 1, (right - left - 1)[:, None]))
+        # Tāda pati interpolācija kā group_stats.group_quantiles
+        result = np.where(gamma >= 0.5, b - (b - a) * (1 - gamma), a + (b - a) * gamma)
+        result[empty] = np.nan
+        return result
@@ -0,0 +1,175 @@
+import argparse
+import numpy as np
+import pandas as pd
+
+import sensor_cache
+
+# Kodola platums pēc Skota likuma (kā scipy gaussian_kde un seaborn kdeplot); režģis sniedzas cut platumus aiz datiem
+grid_size = 1024
+cut = 3
+
+def scott_bandwidth(values):
+    """Gaussian kernel standard deviation by Scott's rule: std * n^(-1/5)."""
+    values = np.asarray(values, dtype=np.float64)
+    return np.std(values, ddof=1) * len(values) ** (-1 / 5) if len(values) > 1 else 0.0
+
+def common_grid(series, bandwidths, size=grid_size):
+    """Evenly spaced evaluation grid covering every series plus cut bandwidths on each side."""
+    low = min(np.min(values) - cut * bw for values, bw in zip(series, bandwidths))
+    high = max(np.max(values) + cut * bw for values, bw in zip(series, bandwidths))
+    if high == low:
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, size)
+
+def _linear_binning(series, grids):
+    """(m, grid size) matrix of sample weights split linearly between the two nearest points of each row's grid."""
+    size = grids.shape[1]
+    dx = grids[:, 1] - grids[:, 0]
+    rows, positions = [], []
+    for row, values in enumerate(series):
+        positions.append((values - grids[row, 0]) / dx[row])
+        rows.append(np.full(len(values), row))
+    rows, positions = np.concatenate(rows), np.clip(np.concatenate(positions), 0, size - 1)
+
+    left = np.minimum(np.floor(positions).astype(np.int64), size - 2)
+    right_weight = positions - left
+    flat = rows * size + left
+    counts = np.bincount(flat, weights=1 - right_weight, minlength=len(series) * size)
+    counts += np.bincount(flat + 1, weights=right_weight, minlength=len(series) * size)
+    return counts.reshape(len(series), size)
+
+def binned_kde(series, bandwidths=None, groups=None, size=grid_size):
+    """
+    Gaussian KDEs of several 1-D samples. Rows with the same group label share an evaluation grid
+    (all rows by default), so that their densities can be compared point by point.
+    The samples are linearly binned, and every row is convolved with its own kernel in a single batched FFT.
+    Returns ((m, size) grids, (m, size) densities).
+    """
+    series = [np.asarray(values, dtype=np.float64) for values in series]
+    if bandwidths is None:
+        bandwidths = [scott_bandwidth(values) for values in series]
+    groups = np.zeros(len(series), dtype=np.int64) if groups is None else np.asarray(groups)
+
+    grids = np.empty((len(series), size))
+    for group in np.unique(groups):
+        rows = np.flatnonzero(groups == group)
+        grids[rows] = common_grid([series[i] for i in rows], [bandwidths[i] for i in rows], size)
+    dx = grids[:, 1] - grids[:, 0]
+
+    counts = _linear_binning(series, grids)
+    counts /= np.maximum(counts.sum(axis=1, keepdims=True), 1)
+
+    # Nulles platums (nemainīgs signāls) tiek aizstāts ar vienu režģa soli; kodols tiek izteikts režģa soļos
+    widths = np.maximum(np.asarray(bandwidths, dtype=np.float64), dx) / dx
+    length = 1 << int(np.ceil(np.log2(2 * size)))
+    offsets = np.fft.fftfreq(length, 1 / length)
+    kernels = np.exp(-0.5 * (offsets[None, :] / widths[:, None]) ** 2) / (np.sqrt(2 * np.pi) * widths[:, None])
+
+    densities = np.fft.irfft(np.fft.rfft(counts, length, axis=1) * np.fft.rfft(kernels, axis=1), length, axis=1)
+    return grids, np.maximum(densities[:, :size], 0) / dx[:, None]
+
+def histograms(series, edges):
+    """(m, len(edges) - 1) normalised histograms (density) of several samples over the same bin edges."""
+    edges = np.asarray(edges, dtype=np.float64)
+    n_bins = len(edges) - 1
+    rows, bins = [], []
+    for row, values in enumerate(series):
+        index = np.searchsorted(edges, values, side='right') - 1
+        index[np.asarray(values) == edges[-1]] = n_bins - 1
+        inside = (index >= 0) & (index < n_bins)
+        rows.append(np.full(inside.sum(), row))
+        bins.append(index[inside])
+    counts = np.bincount(np.concatenate(rows) * n_bins + np.concatenate(bins),
+                         minlength=len(series) * n_bins).reshape(len(series), n_bins).astype(np.float64)
+    return counts / np.maximum(counts.sum(axis=1, keepdims=True), 1) / np.diff(edges)
+
+def ks_statistic(a, b):
+    """Two-sample Kolmogorov-Smirnov statistic (max distance between the empirical CDFs)."""
+    a, b = np.sort(a), np.sort(b)
+    points = np.concatenate([a, b])
+    return np.max(np.abs(np.searchsorted(a, points, side='right') / len(a)
+                         - np.searchsorted(b, points, side='right') / len(b)))
+
+def wasserstein(a, b):
+    """1-D Wasserstein-1 distance: the area between the two empirical CDFs."""
+    a, b = np.sort(a), np.sort(b)
+    points = np.sort(np.concatenate([a, b]))
+    cdf_a = np.searchsorted(a, points[:-1], side='right') / len(a)
+    cdf_b = np.searchsorted(b, points[:-1], side='right') / len(b)
+    return np.sum(np.abs(cdf_a - cdf_b) * np.diff(points))
+
+def compare(series, baselines, labels=None):
+    """
+    Compares every sample in series with its baseline sample (one shared baseline, or one per sample).
+    Returns a table with n, mean, std, KS statistic, Wasserstein distance and KDE overlap coefficient per sample.
+    """
+    series = [np.asarray(values, dtype=np.float64) for values in series]
+    if isinstance(baselines, np.ndarray) and baselines.ndim == 1:
+        baselines = [baselines] * len(series)
+    baselines = [np.asarray(values, dtype=np.float64) for values in baselines]
+
+    # Katrs pāris (paraugs, bāzes līnija) izmanto savu režģi, bet visi blīvumi tiek aprēķināti vienā FFT
+    pairs = np.arange(len(series))
+    grids, densities = binned_kde(series + baselines, groups=np.concatenate([pairs, pairs]))
+    dx = grids[:len(series), 1] - grids[:len(series), 0]
+    overlap = np.minimum(densities[:len(series)], densities[len(series):]).sum(axis=1) * dx
+
+    return pd.DataFrame({
+        'label': labels if labels is not None else pairs,
+        'n': [len(values) for values in series],
+        'mean': [values.mean() for values in series],
+        'std': [values.std(ddof=1) for values in series],
+        'ks': [ks_statistic(values, baseline) for values, baseline in zip(series, baselines)],
+        'wasserstein': [wasserstein(values, baseline) for values, baseline in zip(series, baselines)],
+        'overlap': overlap,
+    })
+
+def rank_captures(captures, baseline_condition='normal'):
+    """
+    Compares each channel of every capture with the same channel of the baseline_condition capture
+    of the same sensor and speed. Returns one table, sorted from most to least different (KS statistic).
+    """
+    baselines = {(c.speed_hz, c.sensor): c for c in captures if c.condition == baseline_condition}
+    series, base_series, metadata = [], [], []
+    for capture in captures:
+        baseline = baselines.get((capture.speed_hz, capture.sensor))
+        if baseline is None or baseline is capture:
+            continue
+        for axis, base_axis, channel in zip(capture.axes, baseline.axes, capture.columns[1:]):
+            series.append(axis)
+            base_series.append(base_axis)
+            metadata.append((capture.speed_hz, capture.sensor, capture.condition, channel))
+
+    if not series:
+        return pd.DataFrame()
+    table = compare(series, base_series).drop(columns='label')
+    table = pd.DataFrame(metadata, columns=['speed_hz', 'sensor', 'condition', 'channel']).join(table)
+    return table.sort_values('ks', ascending=False, ignore_index=True)
+
+def plot_kde(grids, densities, labels, colors=None, ax=None):
+    """Optional filled KDE plot in the notebook's style (matplotlib is only imported here)."""
+    import matplotlib.pyplot as plt
+    ax = ax or plt.gca()
+    grids = np.broadcast_to(grids, np.shape(densities))
+    for i, (grid, density, label) in enumerate(zip(grids, densities, labels)):
+        color = colors[i] if colors is not None else None
+        ax.fill_between(grid, density, alpha=0.25, color=color)
+        ax.plot(grid, density, label=label, color=color)
+    ax.legend()
+    return ax
+
+def main():
+    parser = argparse.ArgumentParser(description="Ranks sensor captures by how far their distributions are from the baseline.")
+    parser.add_argument("--root", default=sensor_cache.data_root, help="chosen_df directory")
+    parser.add_argument("--baseline", default='normal', help="Baseline condition")
+    parser.add_argument("--output", default=None, help="Optional CSV for the ranking table")
+    args = parser.parse_args()
+
+    ranking = rank_captures(sensor_cache.load_captures(args.root), args.baseline)
+    print(ranking.to_string(index=False))
+    if args.output:
+        ranking.to_csv(args.output, index=False)
+        print(f"Ranking saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import os
+import re
+import json
+import numpy as np
+import pandas as pd
+
+# Mērījumu direktorija: chosen_df/{10,30,50}hz/{sensors}_{acc|mag}_{stāvoklis}.csv
+data_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chosen_df')
+cache_dir_name = '.cache'
+cache_version = 2
+
+_capture_name = re.compile(r'(?P<sensor>[a-z0-9]+)_(?P<kind>[a-z]+)_(?P<condition>[a-z]+)\.csv$')
+_speed_dir = re.compile(r'(?P<speed>\d+)hz$')
+
+def parse_capture_path(csv_path):
+    """Returns sensor, kind, condition and speed_hz parsed from chosen_df/<speed>hz/<sensor>_<kind>_<condition>.csv."""
+    name_match = _capture_name.match(os.path.basename(csv_path))
+    if name_match is None:
+        raise ValueError(f"Not a sensor capture file name: {csv_path}")
+    speed_match = _speed_dir.match(os.path.basename(os.path.dirname(os.path.abspath(csv_path))))
+    metadata = name_match.groupdict()
+    metadata['speed_hz'] = int(speed_match.group('speed')) if speed_match else None
+    return metadata
+
+def capture_path(speed_hz, sensor, kind, condition, root=data_root):
+    """Path of a capture in the chosen_df layout, e.g. capture_path(50, 'iis2dh', 'acc', 'normal')."""
+    return os.path.join(root, f'{speed_hz}hz', f'{sensor}_{kind}_{condition}.csv')
+
+class SensorCapture:
+    """One cached capture: float64 time and float32 x, y, z columns memory-mapped from the cache."""
+
+    def __init__(self, columns, time, axes, metadata):
+        self.columns = columns
+        self._time = time
+        self._axes = axes
+        self.sensor = metadata['sensor']
+        self.kind = metadata['kind']
+        self.condition = metadata['condition']
+        self.speed_hz = metadata['speed_hz']
+
+    def __len__(self):
+        return len(self._time)
+
+    @property
+    def time(self):
+        """Time in seconds (float64, exactly as in the source file)."""
+        return self._time
+
+    @property
+    def axes(self):
+        """(3, n) float32 view of the x, y and z columns."""
+        return self._axes
+
+    def to_dataframe(self):
+        """DataFrame with the source column names (Time, A_x [g], ... or M_x [gauss], ...)."""
+        frame = {self.columns[0]: self.time}
+        frame.update({name: axis for name, axis in zip(self.columns[1:], self.axes)})
+        return pd.DataFrame(frame)
+
+def _cache_paths(csv_path, cache_dir):
+    metadata = parse_capture_path(csv_path)
+    speed = f"{metadata['speed_hz']}hz_" if metadata['speed_hz'] is not None else ''
+    stem = speed + os.path.splitext(os.path.basename(csv_path))[0]
+    return (os.path.join(cache_dir, stem + '.f64'), os.path.join(cache_dir, stem + '.f32'),
+            os.path.join(cache_dir, stem + '.json'))
+
+def _source_state(csv_path):
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def _default_cache_dir(csv_path):
+    # Kešatmiņa ir viena visiem ātrumiem: chosen_df/.cache
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(csv_path))), cache_dir_name)
+
+def build_cache(csv_path, cache_dir=None):
+    """
+    Parses the CSV once and writes the time column as a float64 file, the x, y and z columns
+    as a (3, n) float32 file, plus a JSON metadata file.
+    """
+    cache_dir = cache_dir or _default_cache_dir(csv_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    time_path, axes_path, meta_path = _cache_paths(csv_path, cache_dir)
+    state = _source_state(csv_path)
+
+    df = pd.read_csv(csv_path, dtype=np.float64)
+    if df.shape[1] != 4:
+        raise ValueError(f"Expected Time and three axis columns in {csv_path}, got {list(df.columns)}")
+    values = df.to_numpy().T
+
+    # Laiks paliek float64 (float32 ar 24 bitu mantisu garos ierakstos zaudētu mikrosekundes); asis float32
+    # Dati tiek ierakstīti pirms metadatiem, tāpēc metadati nekad nenorāda uz nepabeigtu failu
+    for path, column_data, dtype in ((time_path, values[0], np.float64), (axes_path, values[1:], np.float32)):
+        np.ascontiguousarray(column_data, dtype=dtype).tofile(path + '.tmp')
+        os.replace(path + '.tmp', path)
+
+    metadata = {
+        'version': cache_version,
+        'source': os.path.abspath(csv_path),
+        **state,
+        'rows': int(values.shape[1]),
+        'columns': list(df.columns),
+        **parse_capture_path(csv_path),
+    }
+    with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(metadata, f)
+    os.replace(meta_path + '.tmp', meta_path)
+    return metadata
+
+def _read_metadata(csv_path, cache_dir):
+    """Returns the cache metadata if the cache is complete and matches the current source file, else None."""
+    time_path, axes_path, meta_path = _cache_paths(csv_path, cache_dir)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    state = _source_state(csv_path)
+    if (metadata.get('version') != cache_version or metadata.get('size') != state['size']
+            or metadata.get('mtime_ns') != state['mtime_ns']):
+        return None
+    for path, size in ((time_path, 8 * metadata['rows']), (axes_path, 3 * 4 * metadata['rows'])):
+        if not os.path.exists(path) or os.path.getsize(path) != size:
+            return None
+    return metadata
+
+def load_capture(csv_path, cache_dir=None):
+    """Returns a SensorCapture for csv_path, (re)building its cache if it is missing or the CSV changed."""
+    cache_dir = cache_dir or _default_cache_dir(csv_path)
+    metadata = _read_metadata(csv_path, cache_dir)
+    if metadata is None:
+        metadata = build_cache(csv_path, cache_dir)
+
+    time_path, axes_path, _ = _cache_paths(csv_path, cache_dir)
+    rows = metadata['rows']
+    if rows == 0:
+        time, axes = np.empty(0, dtype=np.float64), np.empty((3, 0), dtype=np.float32)
+    else:
+        time = np.memmap(time_path, dtype=np.float64, mode='r', shape=(rows,))
+        axes = np.memmap(axes_path, dtype=np.float32, mode='r', shape=(3, rows))
+    return SensorCapture(metadata['columns'], time, axes, metadata)
+
+def load_dataframe(csv_path, cache_dir=None):
+    """Drop-in replacement for pd.read_csv(csv_path) on a sensor capture, served from the cache."""
+    return load_capture(csv_path, cache_dir).to_dataframe()
+
+def load_captures(root=data_root, cache_dir=None, sensor=None, kind=None, condition=None, speed_hz=None):
+    """Loads every capture under root that matches the given sensor/kind/condition/speed filters, sorted by path."""
+    captures = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != cache_dir_name)
+        for filename in sorted(filenames):
+            if _capture_name.match(filename) is None:
+                continue
+            csv_path = os.path.join(dirpath, filename)
+            metadata = parse_capture_path(csv_path)
+            wanted = {'sensor': sensor, 'kind': kind, 'condition': condition, 'speed_hz': speed_hz}
+            if all(value is None or metadata[key] == value for key, value in wanted.items()):
+                captures.append(load_capture(csv_path, cache_dir))
+    return captures
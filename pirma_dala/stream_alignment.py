@@ -0,0 +1,133 @@
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.ndimage import convolve1d
+from scipy.signal import firwin
+
+import sensor_cache
+
+# Intervāls, kas garāks par gap_factor * mediānas intervālu, tiek uzskatīts par pārtraukumu
+gap_factor = 1.5
+fir_taps_per_step = 8
+
+def find_gaps(time, factor=gap_factor):
+    """
+    Reports dropouts (intervals longer than factor x the median interval) and non-increasing timestamps.
+    Returns a DataFrame with kind, start, end, duration_s and missing_samples columns.
+    """
+    time = np.asarray(time, dtype=np.float64)
+    intervals = np.diff(time)
+    columns = ['kind', 'start', 'end', 'duration_s', 'missing_samples']
+    if intervals.size == 0:
+        return pd.DataFrame(columns=columns)
+
+    nominal = np.median(intervals)
+    rows = np.flatnonzero((intervals > factor * nominal) | (intervals <= 0))
+    gaps = intervals[rows]
+    return pd.DataFrame({
+        'kind': np.where(gaps > 0, 'gap', 'non_increasing'),
+        'start': time[rows],
+        'end': time[rows + 1],
+        'duration_s': gaps,
+        'missing_samples': np.maximum(np.rint(gaps / nominal).astype(np.int64) - 1, 0),
+    }, columns=columns)
+
+def _increasing(time, values):
+    """Drops samples whose timestamp does not increase (repeated or out-of-order readings)."""
+    keep = np.r_[True, time[1:] > np.maximum.accumulate(time)[:-1]]
+    return time[keep], values[:, keep]
+
+def _linear_weights(time, grid):
+    """Left sample index and weight of each grid point, shared by every channel of the stream."""
+    right = np.clip(np.searchsorted(time, grid, side='right'), 1, len(time) - 1)
+    left = right - 1
+    weight = (grid - time[left]) / (time[right] - time[left])
+    return left, np.clip(weight, 0, 1)
+
+def uniform_grid(start, stop, fs):
+    """Time points start, start + 1/fs, ... up to stop (inclusive)."""
+    return start + np.arange(int(np.floor((stop - start) * fs + 1e-9)) + 1) / fs
+
+def resample(time, values, grid, method='antialias', factor=gap_factor):
+    """
+    Resamples (channels, n) values taken at irregular times onto a uniform grid.
+    method='linear' interpolates directly. method='antialias' interpolates onto a grid k times finer,
+    applies a zero-phase FIR low-pass at the target Nyquist frequency and keeps every k-th sample.
+    This only matters when the grid is coarser than the source.
+    Returns (resampled values, mask of grid points that fall inside a gap).
+    """
+    if method not in ('linear', 'antialias'):
+        raise ValueError(f"Unknown resampling method {method!r}, expected 'linear' or 'antialias'")
+    time = np.asarray(time, dtype=np.float64)
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    time, values = _increasing(time, values)
+    grid = np.asarray(grid, dtype=np.float64)
+
+    intervals = np.diff(time)
+    gap_intervals = intervals > factor * np.median(intervals)
+    left, weight = _linear_weights(time, grid)
+    in_gap = gap_intervals[left] & (weight > 0) & (weight < 1)
+
+    fs = 1 / (grid[1] - grid[0]) if len(grid) > 1 else np.inf
+    step = int(np.ceil(1 / (np.median(intervals) * fs))) if method == 'antialias' and np.isfinite(fs) else 1
+
+    if step <= 1:
+        resampled = values[:, left] * (1 - weight) + values[:, left + 1] * weight
+    else:
+        fine_grid = grid[0] + np.arange((len(grid) - 1) * step + 1) / (fs * step)
+        fine_left, fine_weight = _linear_weights(time, fine_grid)
+        fine = values[:, fine_left] * (1 - fine_weight) + values[:, fine_left + 1] * fine_weight
+        taps = firwin(2 * fir_taps_per_step * step + 1, 1 / step)
+        resampled = convolve1d(fine, taps, axis=1, mode='nearest')[:, ::step]
+
+    resampled[:, in_gap] = np.nan
+    return resampled, in_gap
+
+def align_captures(captures, fs=None, method='antialias', factor=gap_factor):
+    """
+    Resamples several captures (e.g. an accelerometer and a magnetometer run) onto one uniform time base
+    covering the interval all of them recorded. fs defaults to the slowest capture's sample rate.
+    Returns (aligned DataFrame with Time and every channel, gaps DataFrame with a stream column).
+    """
+    columns = [name for capture in captures for name in capture.columns[1:]]
+    if len(set(columns)) != len(columns):
+        raise ValueError(f"Captures have overlapping channel names: {columns}")
+
+    times = [capture.time for capture in captures]
+    if fs is None:
+        fs = min((len(time) - 1) / (time[-1] - time[0]) for time in times)
+    grid = uniform_grid(max(time[0] for time in times), min(time[-1] for time in times), fs)
+
+    aligned = {'Time': grid}
+    gap_tables = []
+    for capture, time in zip(captures, times):
+        resampled, _ = resample(time, capture.axes, grid, method, factor)
+        aligned.update(zip(capture.columns[1:], resampled.astype(np.float32)))
+
+        gaps = find_gaps(time, factor)
+        gaps.insert(0, 'stream', f'{capture.speed_hz}hz_{capture.sensor}_{capture.kind}_{capture.condition}')
+        gap_tables.append(gaps)
+
+    return pd.DataFrame(aligned), pd.concat(gap_tables, ignore_index=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Aligns the accelerometer and magnetometer captures of one run.")
+    parser.add_argument("speed_hz", type=int, help="Motor speed folder (10, 30 or 50)")
+    parser.add_argument("condition", help="normal or disbalance")
+    parser.add_argument("--fs", type=float, default=None, help="Output sample rate (slowest stream by default)")
+    parser.add_argument("--method", choices=['linear', 'antialias'], default='antialias')
+    parser.add_argument("--output", default=None, help="CSV for the aligned streams")
+    args = parser.parse_args()
+
+    captures = sensor_cache.load_captures(speed_hz=args.speed_hz, condition=args.condition)
+    aligned, gaps = align_captures(captures, args.fs, args.method)
+    print(f"{len(aligned)} aligned samples at {1 / np.median(np.diff(aligned['Time'])):.2f} Hz, "
+          f"{len(gaps)} gap(s) / dropout(s)")
+    if len(gaps):
+        print(gaps.to_string(index=False))
+    output = args.output or f"aligned_{args.speed_hz}hz_{args.condition}.csv"
+    aligned.to_csv(output, index=False)
+    print(f"Aligned streams saved to {output}")
+
+if __name__ == "__main__":
+    main()
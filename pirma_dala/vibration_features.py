@@ -0,0 +1,131 @@
+import argparse
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import sensor_cache
+
+# Joslu robežas (Hz); joslas virs Naikvista frekvences ir NaN (magnetometrs ~102 Hz, akselerometrs ~1359 Hz)
+band_edges = (0, 10, 30, 60, 120, 250, 500)
+axis_names = ('x', 'y', 'z')
+
+def sample_rate(time):
+    """Mean sample rate of a capture from its time column."""
+    return (len(time) - 1) / (time[-1] - time[0])
+
+def window_view(axes, window, hop):
+    """(axes, n) array -> (axes, n_windows, window) strided view; no data is copied."""
+    return sliding_window_view(axes, window, axis=-1)[..., ::hop, :]
+
+def band_labels(edges=band_edges):
+    return [f'band_{low}_{high}_hz' for low, high in zip(edges[:-1], edges[1:])]
+
+def window_features(windows, fs, edges=band_edges):
+    """
+    Computes the features of every row of windows (m x window samples) in one pass.
+    fs holds each row's sample rate. Returns a dict of (m,) arrays.
+    """
+    x = np.asarray(windows, dtype=np.float64)
+    fs = np.broadcast_to(np.asarray(fs, dtype=np.float64), x.shape[:1])
+    length = x.shape[1]
+
+    centered = x - x.mean(axis=1, keepdims=True)
+    m2 = np.mean(centered ** 2, axis=1)
+    m3 = np.mean(centered ** 3, axis=1)
+    m4 = np.mean(centered ** 4, axis=1)
+    rms = np.sqrt(m2)
+
+    # Nemainīgā logā (kvantēts sensors miera stāvoklī) formas rādītāji nav definēti
+    with np.errstate(divide='ignore', invalid='ignore'):
+        flat = m2 == 0
+        crest_factor = np.where(flat, np.nan, np.abs(centered).max(axis=1) / rms)
+        skewness = np.where(flat, np.nan, m3 / m2 ** 1.5)
+        kurtosis = np.where(flat, np.nan, m4 / m2 ** 2 - 3)
+
+    # Vienpusējais jaudas spektrs, normēts tā, lai visu joslu summa ≈ m2 (vidējā kvadrāta vērtība)
+    taper = np.hanning(length)
+    power = np.abs(np.fft.rfft(centered * taper, axis=1)) ** 2
+    power[:, 1:(length + 1) // 2] *= 2
+    power /= length * np.sum(taper ** 2)
+
+    dominant_bin = np.argmax(power[:, 1:], axis=1) + 1
+    dominant_hz = np.where(flat, np.nan, dominant_bin * fs / length)
+
+    # Joslas enerģija kā kumulatīvās summas starpība: bin k pieder [low, high), ja low <= k*fs/N < high
+    cumulative = np.concatenate([np.zeros((len(x), 1)), np.cumsum(power, axis=1)], axis=1)
+    edge_bins = np.clip(np.ceil(np.outer(length / fs, edges)).astype(np.int64), 0, power.shape[1])
+    energies = np.diff(np.take_along_axis(cumulative, edge_bins, axis=1), axis=1)
+    energies[np.asarray(edges[:-1])[None, :] >= fs[:, None] / 2] = np.nan
+
+    features = {
+        'rms': rms,
+        'peak_to_peak': np.ptp(x, axis=1),
+        'crest_factor': crest_factor,
+        'kurtosis': kurtosis,
+        'skewness': skewness,
+        'dominant_hz': dominant_hz,
+    }
+    features.update(zip(band_labels(edges), energies.T))
+    return features
+
+def _feature_table(batch, window, hop, edges):
+    """Stacks the windows of every capture in batch and computes their features together."""
+    windows, fs, columns = [], [], {'capture': [], 'window': [], 'start_time': [], 'axis': []}
+    for capture_id, capture in batch:
+        view = window_view(capture.axes, window, hop)
+        n_windows = view.shape[1]
+        time = capture.time
+        windows.append(view.reshape(-1, window))
+        fs.append(np.full(view.shape[0] * n_windows, sample_rate(time)))
+
+        columns['capture'].append(np.full(view.shape[0] * n_windows, capture_id))
+        columns['window'].append(np.tile(np.arange(n_windows), view.shape[0]))
+        columns['start_time'].append(np.tile(time[::hop][:n_windows], view.shape[0]))
+        columns['axis'].append(np.repeat(np.array(axis_names), n_windows))
+
+    table = {name: np.concatenate(parts) for name, parts in columns.items()}
+    table.update(window_features(np.concatenate(windows), np.concatenate(fs), edges))
+    return table
+
+def extract_features(captures, window=256, hop=128, edges=band_edges, max_batch_windows=65536):
+    """
+    Returns one feature table (a row per capture, window and axis) for a list of sensor_cache captures.
+    Windows are window samples long with hop samples between starts; captures shorter than a window are skipped.
+    Captures are processed in batches of about max_batch_windows windows to bound memory use.
+    """
+    metadata = pd.DataFrame([{'sensor': c.sensor, 'kind': c.kind, 'condition': c.condition,
+                              'speed_hz': c.speed_hz} for c in captures])
+    tables, batch, batch_windows = [], [], 0
+    for capture_id, capture in enumerate(captures):
+        if len(capture) < window:
+            continue
+        batch.append((capture_id, capture))
+        batch_windows += 3 * ((len(capture) - window) // hop + 1)
+        if batch_windows >= max_batch_windows:
+            tables.append(pd.DataFrame(_feature_table(batch, window, hop, edges)))
+            batch, batch_windows = [], 0
+    if batch:
+        tables.append(pd.DataFrame(_feature_table(batch, window, hop, edges)))
+
+    if not tables:
+        return pd.DataFrame(columns=['sensor', 'kind', 'condition', 'speed_hz', 'window', 'start_time', 'axis'])
+    features = pd.concat(tables, ignore_index=True)
+    features = metadata.iloc[features.pop('capture')].reset_index(drop=True).join(features)
+    return features
+
+def main():
+    parser = argparse.ArgumentParser(description="Computes windowed vibration features of all sensor captures.")
+    parser.add_argument("--root", default=sensor_cache.data_root, help="chosen_df directory")
+    parser.add_argument("--sensor", default=None, help="Only this sensor (e.g. iis2dh)")
+    parser.add_argument("--window", type=int, default=256, help="Window length in samples")
+    parser.add_argument("--hop", type=int, default=128, help="Samples between window starts")
+    parser.add_argument("--output", default="vibration_features.csv")
+    args = parser.parse_args()
+
+    captures = sensor_cache.load_captures(args.root, sensor=args.sensor)
+    features = extract_features(captures, args.window, args.hop)
+    features.to_csv(args.output, index=False)
+    print(f"{len(features)} feature rows from {len(captures)} captures saved to {args.output}")
+
+if __name__ == "__main__":
+    main()